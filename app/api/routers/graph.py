@@ -0,0 +1,113 @@
+from typing import Callable, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.config.config import GRAPH_CACHE_MAX_AGE
+from app.config.neo4j_config import get_shared_driver
+from app.services import graph_service
+from app.services.graph_cache import graph_cache
+
+router = APIRouter()
+
+# plain `def` endpoints: neo4j calls block, so FastAPI runs them in its threadpool
+
+def _cached_read(request: Request, response: Response, key: tuple, query: Callable, missing: str):
+    """
+    Serve `query(driver)` through the shared read cache with an ETag, answering
+    304 when the client already has the current version.
+    """
+    def load():
+        try:
+            driver = get_shared_driver()
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Neo4j unavailable: {e}")
+        return query(driver)
+
+    value, etag = graph_cache.get(key, load)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={GRAPH_CACHE_MAX_AGE}"}
+    if value is None:
+        raise HTTPException(status_code=404, detail=missing)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return value
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison: a W/ prefix is ignored, "*" matches any current version
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+@router.get("/units")
+def list_units(request: Request, response: Response):
+    """
+    All units with their number and chapter count.
+    """
+    return _cached_read(request, response, ("units",), graph_service.list_units, "No units")
+
+@router.get("/chapters")
+def list_chapters(request: Request, response: Response, unit: Optional[str] = None):
+    """
+    Chapters of every unit, or only of `unit` when given.
+    """
+    return _cached_read(
+        request, response, ("chapters", unit),
+        lambda driver: graph_service.list_chapters(driver, unit),
+        "Unit not found",
+    )
+
+@router.get("/chapters/{chapter:path}/qa")
+def get_chapter_qa(chapter: str, request: Request, response: Response):
+    """
+    The generated question-answer pairs of a chapter.
+    """
+    return _cached_read(
+        request, response, ("qa", chapter),
+        lambda driver: _chapter_field(driver, chapter, "qa"),
+        "Chapter not found or has no QA",
+    )
+
+@router.get("/chapters/{chapter:path}/script")
+def get_chapter_script(chapter: str, request: Request, response: Response):
+    """
+    The animation script of a chapter.
+    """
+    return _cached_read(
+        request, response, ("script", chapter),
+        lambda driver: _chapter_field(driver, chapter, "animation"),
+        "Chapter not found or has no animation script",
+    )
+
+@router.get("/chapters/{chapter:path}/prerequisites")
+def get_chapter_prerequisites(chapter: str, request: Request, response: Response, depth: int = Query(1, ge=1, le=10)):
+    """
+    Chapters this chapter depends on, up to `depth` hops away, nearest first.
+    """
+    return _cached_read(
+        request, response, ("prerequisites", chapter, depth),
+        lambda driver: graph_service.get_prerequisites(driver, chapter, depth),
+        "Chapter not found",
+    )
+
+@router.get("/chapters/{chapter:path}")
+def get_chapter(chapter: str, request: Request, response: Response):
+    """
+    A chapter with its content, competencies, QA and animation script.
+    """
+    return _cached_read(
+        request, response, ("chapter", chapter),
+        lambda driver: graph_service.get_chapter(driver, chapter),
+        "Chapter not found",
+    )
+
+def _chapter_field(driver, chapter: str, field: str):
+    # served from the cached chapter when it is already there
+    data, _ = graph_cache.get(("chapter", chapter), lambda: graph_service.get_chapter(driver, chapter))
+    return data[field] if data else None
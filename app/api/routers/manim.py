@@ -1,7 +1,7 @@
 from concurrent.futures import ThreadPoolExecutor
 from fastapi import APIRouter, HTTPException
-from app.pipelines.manim_pipeline import process_manim_script_pipeline
-from app.utils.job_status import create_job, update_job, get_job, JobStatus
+from app.services.job_runner import submit_job
+from app.utils.job_status import get_job, JobStatus
 
 router = APIRouter()
 executor = ThreadPoolExecutor(max_workers=4)
@@ -10,7 +10,7 @@ executor = ThreadPoolExecutor(max_workers=4)
 async def generate_manim_code(subject: str, syllabus_job_id: str):
     """
     Generates Manim videos based on the syllabus JSON produced by the syllabus pipeline.
-    
+
     Args:
         subject: The subject name (e.g., "Mathematics")
         syllabus_job_id: The job ID of the completed syllabus extraction
@@ -27,17 +27,12 @@ async def generate_manim_code(subject: str, syllabus_job_id: str):
     if not syllabus_data:
         raise HTTPException(status_code=400, detail="No syllabus data found in job result")
 
-    job_id = create_job()
-
-    def run_manim():
-        try:
-            update_job(job_id, JobStatus.RUNNING)
-            result = process_manim_script_pipeline(subject, syllabus_data)
-            update_job(job_id, JobStatus.COMPLETED, result=result)
-        except Exception as e:
-            update_job(job_id, JobStatus.FAILED, error=str(e))
-
-    executor.submit(run_manim)
+    # the worker re-reads the syllabus from the job store instead of copying it into the payload
+    job_id = submit_job(
+        "manim",
+        {"subject": subject, "syllabus_job_id": syllabus_job_id},
+        executor.submit,
+    )
     return {"job_id": job_id, "status": "queued"}
 
 
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from app.services.llm_governor import get_llm_metrics
+from app.services.tex_cache import get_tex_cache_stats
+from app.services.graph_cache import get_graph_cache_stats
+
+router = APIRouter()
+
+@router.get("/llm")
+async def llm_metrics():
+    """
+    Per-provider LLM call counters for this process: retries, 429s,
+    seconds spent throttled or backing off and the current concurrency limit.
+    """
+    return get_llm_metrics()
+
+@router.get("/tex_cache")
+async def tex_cache_metrics():
+    """
+    Hit rate and size of the shared LaTeX/MathTex cache used by all renders on this host.
+    """
+    return get_tex_cache_stats()
+
+@router.get("/graph_cache")
+async def graph_cache_metrics():
+    """
+    Hit rate and size of this process's cache in front of the Neo4j read API.
+    """
+    return get_graph_cache_stats()
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, BackgroundTasks
-from app.pipelines.syllabus_pipeline import process_syllabus_pipeline
-from app.utils.job_status import create_job, update_job, get_job, JobStatus
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from app.config.config import PIPELINE_VERSION
+from app.services.job_runner import submit_job, submit_job_once, cancel_job, resume_job
+from app.services.upload_service import spool_pdf_upload
+from app.utils.job_status import get_job, get_job_spec, JobStatus
+from app.utils.checkpoint import load_checkpoint_progress
 
 router = APIRouter()
 
@@ -14,20 +17,40 @@ async def generate_syllabus(subject: str, pdf_path: str, background_tasks: Backg
       4. Generate video scripts
       5. Push graph to Neo4j and generate a visualization using pyvis in html
     """
-    
-    job_id = create_job()
 
-    def run_pipeline():
-        try:
-            update_job(job_id, JobStatus.RUNNING)
-            result = process_syllabus_pipeline(subject, pdf_path)
-            update_job(job_id, JobStatus.COMPLETED, result=result)
-        except Exception as e:
-            update_job(job_id, JobStatus.FAILED, error=str(e))
-
-    background_tasks.add_task(run_pipeline)
+    job_id = submit_job(
+        "syllabus",
+        {"subject": subject, "pdf_path": pdf_path},
+        background_tasks.add_task,
+    )
     return {"job_id": job_id, "status": "queued"}
 
+@router.post("/upload/")
+async def upload_syllabus(subject: str, request: Request, background_tasks: BackgroundTasks):
+    """
+    Same pipeline as `/generate/`, for a PDF sent as the `file` field of a
+    multipart upload. Uploads are keyed on (PDF hash, subject, pipeline version):
+    a duplicate attaches to the job already running for it, or gets the stored
+    result back immediately.
+    """
+    pdf_path, pdf_hash = await spool_pdf_upload(request)
+    dedup_key = f"syllabus:{pdf_hash}:{subject.strip().casefold()}:{PIPELINE_VERSION}"
+
+    job_id, created = submit_job_once(
+        "syllabus",
+        {"subject": subject, "pdf_path": pdf_path},
+        background_tasks.add_task,
+        dedup_key=dedup_key,
+    )
+    if created:
+        return {"job_id": job_id, "status": "queued", "pdf_hash": pdf_hash, "deduplicated": False}
+
+    job = get_job(job_id)
+    response = {"job_id": job_id, "status": job["status"], "pdf_hash": pdf_hash, "deduplicated": True}
+    if job["status"] == JobStatus.COMPLETED:
+        response["result"] = job["result"]
+    return response
+
 @router.get("/status/{job_id}")
 async def get_status(job_id: str):
     """
@@ -36,4 +59,35 @@ async def get_status(job_id: str):
     job = get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
\ No newline at end of file
+    return job
+
+@router.post("/cancel/{job_id}")
+async def cancel_syllabus_job(job_id: str):
+    """
+    Cancel a pending or running syllabus job. A running job stops after its
+    current chapter; everything finished so far is kept for `/resume/`.
+    """
+    spec = get_job_spec(job_id)
+    if spec is None or spec["kind"] != "syllabus":
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not cancel_job(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is already {spec['status'].value}")
+    return {"job_id": job_id, "status": JobStatus.CANCELLED}
+
+@router.post("/resume/{job_id}")
+async def resume_syllabus_job(job_id: str, background_tasks: BackgroundTasks):
+    """
+    Restart a failed or cancelled syllabus job (or a completed one whose Neo4j
+    push failed) from its last checkpoint, so only the missing stages and
+    chapters are redone.
+    """
+    spec = get_job_spec(job_id)
+    if spec is None or spec["kind"] != "syllabus":
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    resumable = [JobStatus.FAILED, JobStatus.CANCELLED]
+    if spec["status"] == JobStatus.COMPLETED and not (spec["result"] or {}).get("graph_pushed", True):
+        resumable.append(JobStatus.COMPLETED)
+    if not resume_job(job_id, background_tasks.add_task, resumable):
+        raise HTTPException(status_code=409, detail=f"Job is {spec['status'].value}, only failed or cancelled jobs can be resumed")
+    return {"job_id": job_id, "status": "queued", "checkpoint": load_checkpoint_progress(job_id)}
@@ -8,4 +8,133 @@ NEO4J_USER = os.getenv("NEO4J_USERNAME")
 NEO4J_PASS = os.getenv("NEO4J_PASSWORD")
 DEEP_INFRA_API_KEY = os.getenv("DEEP_INFRA_API_KEY")
 DEEP_INFRA_API_URL = os.getenv("DEEP_INFRA_API_URL")
-OPEN_AI_API_KEY = os.getenv("OPEN_AI_API_KEY")
\ No newline at end of file
+OPEN_AI_API_KEY = os.getenv("OPEN_AI_API_KEY")
+
+# deployment: "inline" runs jobs inside the API process,
+# "queue" only enqueues them for worker.py processes
+DEPLOY_MODE = os.getenv("DEPLOY_MODE", "inline")
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))
+
+# job state: "memory" (single process only) or "sqlite" (shared between processes)
+JOB_STORE = os.getenv("JOB_STORE", "sqlite" if DEPLOY_MODE == "queue" else "memory")
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "test_doc/jobs.db")
+# a RUNNING job whose runner has not heartbeated for this long is considered lost:
+# queued jobs are reclaimed by another worker, inline ones are marked failed
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+
+# llm model profiles, referenced by name from LLM_STAGE_ROUTES
+# `provider` selects the rate limit bucket in LLM_PROVIDER_LIMITS, the rest is passed to dspy.LM
+LLM_MODELS = {
+    "qwen3-32b": {
+        "model": "Qwen/Qwen3-32B",
+        "api_key": DEEP_INFRA_API_KEY,
+        "base_url": DEEP_INFRA_API_URL,
+        "provider": "deepinfra",
+        "timeout": 180,
+    },
+    "qwen3-14b": {
+        "model": "Qwen/Qwen3-14B",
+        "api_key": DEEP_INFRA_API_KEY,
+        "base_url": DEEP_INFRA_API_URL,
+        "provider": "deepinfra",
+        "timeout": 60,
+    },
+    # openai reasoning models only accept temperature=1.0 and max_tokens >= 16000
+    "gpt-5": {
+        "model": "openai/gpt-5",
+        "api_key": OPEN_AI_API_KEY,
+        "provider": "openai",
+        "temperature": 1.0,
+        "max_tokens": 16000,
+        "timeout": 300,
+    },
+    "gpt-5-mini": {
+        "model": "openai/gpt-5-mini",
+        "api_key": OPEN_AI_API_KEY,
+        "provider": "openai",
+        "temperature": 1.0,
+        "max_tokens": 16000,
+        "timeout": 120,
+    },
+}
+
+# ordered fallback chain per pipeline stage, overridable with
+# LLM_ROUTE_<STAGE>="profile1,profile2" (e.g. LLM_ROUTE_QA="qwen3-14b,qwen3-32b")
+_DEFAULT_STAGE_ROUTES = {
+    "extraction": ["qwen3-32b", "gpt-5-mini"],
+    "dependencies": ["qwen3-14b", "qwen3-32b"],
+    "qa": ["qwen3-14b", "qwen3-32b"],
+    "scripts": ["qwen3-32b", "gpt-5-mini"],
+    "manim_generation": ["gpt-5", "gpt-5-mini"],
+    "manim_improvement": ["gpt-5-mini", "gpt-5"],
+}
+LLM_STAGE_ROUTES = {
+    stage: [m.strip() for m in os.getenv(f"LLM_ROUTE_{stage.upper()}", ",".join(chain)).split(",") if m.strip()]
+    for stage, chain in _DEFAULT_STAGE_ROUTES.items()
+}
+
+# client-side rate limits per provider, shared by every llm call in the process
+# (rpm/tpm of 0 disables that bucket, concurrency adapts between 1 and max_concurrency)
+LLM_PROVIDER_LIMITS = {
+    "deepinfra": {
+        "rpm": int(os.getenv("DEEP_INFRA_RPM", "180")),
+        "tpm": int(os.getenv("DEEP_INFRA_TPM", "400000")),
+        "max_concurrency": int(os.getenv("DEEP_INFRA_MAX_CONCURRENCY", "16")),
+        "target_latency": float(os.getenv("DEEP_INFRA_TARGET_LATENCY", "90")),
+    },
+    "openai": {
+        "rpm": int(os.getenv("OPEN_AI_RPM", "500")),
+        "tpm": int(os.getenv("OPEN_AI_TPM", "500000")),
+        "max_concurrency": int(os.getenv("OPEN_AI_MAX_CONCURRENCY", "8")),
+        "target_latency": float(os.getenv("OPEN_AI_TARGET_LATENCY", "240")),
+    },
+}
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "60.0"))
+# rough completion size used to charge the tpm bucket before a call is made
+LLM_EST_OUTPUT_TOKENS = int(os.getenv("LLM_EST_OUTPUT_TOKENS", "1500"))
+
+# manim rendering: "pool" renders in warm worker processes that import manim once,
+# "subprocess" runs the manim cli for every render
+MANIM_RENDER_MODE = os.getenv("MANIM_RENDER_MODE", "pool")
+RENDER_POOL_SIZE = int(os.getenv("RENDER_POOL_SIZE", "2"))
+RENDER_MAX_RENDERS_PER_WORKER = int(os.getenv("RENDER_MAX_RENDERS_PER_WORKER", "20"))
+RENDER_MAX_RSS_MB = float(os.getenv("RENDER_MAX_RSS_MB", "1500"))
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "600"))
+
+# content-addressed LaTeX -> SVG cache shared by every render on this host
+TEX_CACHE_DIR = os.getenv("TEX_CACHE_DIR", "test_doc/tex_cache")
+TEX_CACHE_MAX_MB = float(os.getenv("TEX_CACHE_MAX_MB", "512"))
+TEX_CACHE_PREWARM = os.getenv("TEX_CACHE_PREWARM", "1") == "1"
+
+# cold start: importing app.main must stay under this budget and must not pull in heavy deps
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1000"))
+IMPORT_BUDGET_STRICT = os.getenv("IMPORT_BUDGET_STRICT", "0") == "1"
+
+# pdf uploads are stored by content hash; bump PIPELINE_VERSION whenever the syllabus
+# pipeline output changes so old results are no longer reused for new uploads
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "test_doc/uploads")
+UPLOAD_MAX_MB = float(os.getenv("UPLOAD_MAX_MB", "200"))
+PIPELINE_VERSION = os.getenv("PIPELINE_VERSION", "1")
+
+# pack several chapters into one QA / script llm call, sized by an estimated token budget
+LLM_PACKING = os.getenv("LLM_PACKING", "1") == "1"
+LLM_PACK_TOKEN_BUDGET = int(os.getenv("LLM_PACK_TOKEN_BUDGET", "12000"))
+LLM_PACK_MAX_CHAPTERS = int(os.getenv("LLM_PACK_MAX_CHAPTERS", "8"))
+
+# read api over neo4j: in-process LRU of query results, invalidated on every push.
+# the generation file lets pushes from worker processes invalidate API processes on the same host
+GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "1024"))
+GRAPH_CACHE_MAX_AGE = int(os.getenv("GRAPH_CACHE_MAX_AGE", "30"))
+GRAPH_CACHE_GENERATION_FILE = os.getenv("GRAPH_CACHE_GENERATION_FILE", "test_doc/graph_cache.gen")
+
+# per-job checkpoints of finished pipeline stages and chapters, used to resume failed or cancelled jobs
+JOB_WORK_DIR = os.getenv("JOB_WORK_DIR", "test_doc/jobs")
+
+# render logs go to per-iteration files under <output dir>/logs, only their tail is kept in memory;
+# render artifacts (media tree, logs, generated scripts) are pruned oldest first past the quota
+RENDER_LOG_TAIL_CHARS = int(os.getenv("RENDER_LOG_TAIL_CHARS", "8000"))
+RENDER_DISK_QUOTA_MB = float(os.getenv("RENDER_DISK_QUOTA_MB", "5000"))
@@ -1,7 +1,22 @@
-from neo4j import GraphDatabase
+import atexit
+import threading
+
 from app.config.config import NEO4J_URI, NEO4J_USER, NEO4J_PASS
 
+_shared_driver = None
+_shared_lock = threading.Lock()
+
 def get_driver():
+    from neo4j import GraphDatabase
     driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
     driver.verify_connectivity()
     return driver
+
+def get_shared_driver():
+    """Process-wide driver (and connection pool) for the read API; closed at exit, never by callers."""
+    global _shared_driver
+    with _shared_lock:
+        if _shared_driver is None:
+            _shared_driver = get_driver()
+            atexit.register(_shared_driver.close)
+        return _shared_driver
@@ -1,8 +1,17 @@
+import time
+_import_start = time.perf_counter()
+
 from fastapi import FastAPI
-from app.api.routers import syllabus, manim
+from app.api.routers import syllabus, manim, metrics, graph
+from app.utils.import_budget import check_import_budget
 
 app = FastAPI(title="Professor AI")
 
 # routers
 app.include_router(syllabus.router, prefix="/syllabus", tags=["Syllabus"])
 app.include_router(manim.router, prefix="/manim", tags=["Manim"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
+app.include_router(graph.router, prefix="/graph", tags=["Graph"])
+
+# pipelines (dspy, cv2, pdfplumber, pyvis, neo4j) are imported by the job runner on first use
+check_import_budget(time.perf_counter() - _import_start)
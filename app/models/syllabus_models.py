@@ -22,6 +22,11 @@ class AnimationScript(BaseModel):
     key_timestamps: Dict[str, str]
     visual_style: str
 
+class ScriptTopic(BaseModel):
+    topic: str
+    brief_insight: str
+    key_concepts: List[str]
+
 class SyllabusItem(BaseModel):
     unit_title: str
     unit_number: str
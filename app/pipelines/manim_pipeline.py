@@ -1,4 +1,4 @@
-import os, dspy, asyncio
+import os, asyncio, threading
 from datetime import datetime
 from pathlib import Path
 
@@ -10,9 +10,12 @@ from app.services.llm_service import (
 from app.services.manim_services import (
     get_frames_from_video,
     execute_manim,
+    warm_tex_cache,
 )
+from app.services.manim_fixer import apply_fix_rules
+from app.services.render_retention import cleanup_render_artifacts, enforce_render_quota
 from app.utils.code_parser import extract_code_blocks 
-from app.config.config import OPEN_AI_API_KEY
+from app.config.config import TEX_CACHE_PREWARM
 
 
 def get_manim_video_path(code_file: str, quality: str = "1080p60") -> Path:
@@ -32,6 +35,10 @@ async def process_single_manim_file(
     chapter_name = chapter.replace(" ", "_")
     file_path = os.path.join(output_dir, f"{chapter_name}_manim_{timestamp}.py")
 
+    # compile the script's equations into the tex cache while the llm writes the code
+    if TEX_CACHE_PREWARM and script_model.equations:
+        threading.Thread(target=warm_tex_cache, args=(script_model.equations,), daemon=True).start()
+
     # generate initial manim code
     manim_gen = ManimGenerator()
     manim_code = manim_gen(subject, chapter, script_model)
@@ -41,16 +48,22 @@ async def process_single_manim_file(
         f.write(executed_code)
 
     video_path = get_manim_video_path(file_path)
+    log_dir = Path(output_dir) / "logs" / Path(file_path).stem
 
     improver = ImproveCodeOnce()
 
     # iterative improvement loop
     i = 0
     logs, errors = "", ""
+    success = False
+    fixes = []
+    log_files = []
 
     while i < iterations:
         print(f"[Iteration {i+1}/{iterations}] Executing {file_path}...")
-        result = execute_manim(file_path)
+        # full output is streamed to per-iteration log files, `result` only holds the tails
+        result = execute_manim(file_path, log_prefix=str(log_dir / f"iter{i+1}"))
+        log_files.append([result[k] for k in ("stdout_log", "stderr_log") if result.get(k)])
 
         if result["stdout"]:
             print("=== LOGS ===")
@@ -61,12 +74,26 @@ async def process_single_manim_file(
             print(result["stderr"])
 
         if result["returncode"] != 0:
-            print(f"Command failed with exit code {result["returncode"]}")
+            print(f"Command failed with exit code {result['returncode']}")
         else:
             print(f"Execution succeeded on iteration {i+1}")
+            success = True
             break
 
         logs, errors = result["stdout"], result["stderr"]
+
+        # known failure signatures are rewritten locally, skipping an llm round trip
+        fixed_code, fired = apply_fix_rules(executed_code, errors)
+        if fired:
+            executed_code = fixed_code
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(executed_code)
+
+            print(f"Applied rule fixes {fired} on iteration {i+1}")
+            fixes.append({"iteration": i + 1, "rules": fired, "llm": False})
+            i += 1
+            continue
+
         print(f"Errors detected on iteration {i+1}, invoking improver...")
 
         # try to extract video frames if a partial render exists
@@ -90,54 +117,54 @@ async def process_single_manim_file(
             f.write(executed_code)
 
         print(f"Applied improvement on iteration {i+1}")
+        fixes.append({"iteration": i + 1, "rules": [], "llm": True})
 
         i += 1
 
-    print(f"[Final Status] {'Success...' if not errors.strip() else 'Failed after retries...'}")
+    print(f"[Final Status] {'Success...' if success else 'Failed after retries...'}")
+
+    # partial movie files are never needed again; after a success neither are the failed iterations' logs
+    losing_logs = [f for files in log_files[:-1] for f in files] if success else []
+    cleanup_render_artifacts(file_path, losing_logs)
+    enforce_render_quota(output_dir)
 
     return {
         "file": file_path,
         "iterations": i,
-        "success": not bool(errors.strip()),
+        "success": success,
+        "fixes": fixes,
         "logs": logs[-2000:],   # keep last few KB for trace
         "errors": errors[-2000:] if errors else "",
+        "log_files": log_files[-1] if success else [f for files in log_files for f in files],
     }
 
 def process_manim_script_pipeline(subject: str, syllabus_data: list[dict]):
-    # configuration of openai in dspy
-    openai_lm = dspy.LM(
-        model="openai/gpt-5",
-        api_key=OPEN_AI_API_KEY,
-        temperature=1.0,
-        max_tokens=16000,
-    )
-
+    # generation and improvement models are routed per stage (see model_router)
     os.makedirs("test_doc", exist_ok=True)
     results = []
 
-    with dspy.context(lm=openai_lm):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        for item in syllabus_data:
-            if not item.get("animation"):
-                continue
-
-            script_model = AnimationScript(**item["animation"])
-            chapter = item["chapter"]
-
-            # run each item synchronously in this background thread
-            result = loop.run_until_complete(
-                process_single_manim_file(
-                    subject=subject,
-                    chapter=chapter,
-                    script_model=script_model,
-                    output_dir="test_doc",
-                    iterations=3,
-                )
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    for item in syllabus_data:
+        if not item.get("animation"):
+            continue
+
+        script_model = AnimationScript(**item["animation"])
+        chapter = item["chapter"]
+
+        # run each item synchronously in this background thread
+        result = loop.run_until_complete(
+            process_single_manim_file(
+                subject=subject,
+                chapter=chapter,
+                script_model=script_model,
+                output_dir="test_doc",
+                iterations=3,
             )
-            results.append(result)
+        )
+        results.append(result)
 
-        loop.close()
+    loop.close()
 
     return results
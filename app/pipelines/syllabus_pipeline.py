@@ -1,67 +1,142 @@
 from datetime import datetime
-import json, os, dspy
-from app.config.config import DEEP_INFRA_API_KEY, DEEP_INFRA_API_URL
+import json, os
+from uuid import uuid4
 from app.services.pdf_service import extract_syllabus_text
-from app.services.llm_service import SyllabusExtractor, ChapterDependencyFinder, QAGenerator, ScriptGenerator
+from app.services.llm_service import (
+    SyllabusExtractor, ChapterDependencyFinder, QAGenerator, ScriptGenerator,
+    PackedQAGenerator, PackedScriptGenerator,
+)
 from app.services.graph_service import push_syllabus_to_neo4j, visualize_syllabus_graph
 from app.config.neo4j_config import get_driver
-from app.models.syllabus_models import SyllabusItem
-
-def process_syllabus_pipeline(subject: str, pdf_filepath: str):
-    # configuration of qwen in dspy
-    qwen_lm = dspy.LM(
-        model="Qwen/Qwen3-32B",
-        api_key=DEEP_INFRA_API_KEY,
-        base_url=DEEP_INFRA_API_URL,
-    )
-    dspy.configure(lm=qwen_lm)
+from app.models.syllabus_models import SyllabusItem, ChapterQA, AnimationScript
+from app.config.config import LLM_PACKING
+from app.utils.checkpoint import PipelineCheckpoint, job_work_dir
+from app.utils.job_status import JobCancelled, is_current_run
 
+def process_syllabus_pipeline(subject: str, pdf_filepath: str, job_id: str | None = None, run_id: str | None = None):
+    # each llm stage picks its own model from LLM_STAGE_ROUTES (see model_router)
     print(f"[Pipeline] Running syllabus pipeline for {subject}...")
 
-    with dspy.context(lm=qwen_lm):
-        # syllabus extraction
+    # every finished stage / chapter is checkpointed, so rerunning the same job only redoes missing work
+    checkpoint = PipelineCheckpoint(
+        job_work_dir(job_id or str(uuid4())),
+        {"subject": subject, "pdf_path": pdf_filepath},
+    )
+
+    def check_cancelled():
+        # also stops this run when a resume or lease reclaim started a newer one,
+        # so two runs never append to the same checkpoints
+        if job_id and run_id and not is_current_run(job_id, run_id):
+            raise JobCancelled(f"Run {run_id} of job {job_id} was cancelled or superseded")
+
+    # syllabus extraction
+    text = checkpoint.load_stage("text")
+    if text is None:
         text = extract_syllabus_text(pdf_filepath)
+        checkpoint.save_stage("text", text)
+    check_cancelled()
+
+    saved_items = checkpoint.load_stage("syllabus_items")
+    if saved_items is None:
         extractor = SyllabusExtractor()
         syllabus_items: list[SyllabusItem] = extractor(text)
-        # print(syllabus_items[:2])
+        checkpoint.save_stage("syllabus_items", [i.model_dump() for i in syllabus_items])
+    else:
+        syllabus_items = [SyllabusItem(**i) for i in saved_items]
+        print(f"[Pipeline] Resumed {len(syllabus_items)} extracted chapters from checkpoint")
+    index_of = {id(item): idx for idx, item in enumerate(syllabus_items)}
+    # print(syllabus_items[:2])
+
+    # dependencies
+    done = checkpoint.load_units("dependencies")
+    dep_finder = ChapterDependencyFinder()
+    chapters = [i.chapter for i in syllabus_items]
+    for idx, item in enumerate(syllabus_items):
+        if idx in done:
+            item.dependencies = done[idx]
+            continue
+        check_cancelled()
+        item.dependencies = dep_finder(item.chapter, chapters)
+        check_cancelled()
+        checkpoint.save_unit("dependencies", idx, item.dependencies)
+    # print(syllabus_items[:2])
 
-        # dependencies
-        dep_finder = ChapterDependencyFinder()
-        chapters = [i.chapter for i in syllabus_items]
-        for item in syllabus_items:
-            item.dependencies = dep_finder(item.chapter, chapters)
-        # print(syllabus_items[:2])
+    # QA
+    done = checkpoint.load_units("qa")
+    pending = []
+    for idx, item in enumerate(syllabus_items):
+        if idx in done:
+            item.qa = ChapterQA(**done[idx])
+        else:
+            pending.append(item)
 
-        # QA
+    def save_qa(item: SyllabusItem, qa: ChapterQA):
+        check_cancelled()
+        item.qa = qa
+        checkpoint.save_unit("qa", index_of[id(item)], qa.model_dump())
+
+    check_cancelled()
+    if pending and LLM_PACKING:
+        # several chapters per call, see PackedGenerator
+        PackedQAGenerator()(pending, on_result=save_qa)
+    elif pending:
         qa_generator = QAGenerator()
-        for item in syllabus_items:
-            item.qa = qa_generator(item)
-        # print(syllabus_items[:2])
+        for item in pending:
+            save_qa(item, qa_generator(item))
+    # print(syllabus_items[:2])
+
+    # video scripts
+    done = checkpoint.load_units("scripts")
+    pending = []
+    for idx, item in enumerate(syllabus_items):
+        if idx in done:
+            item.animation = AnimationScript(**done[idx])
+        else:
+            pending.append(item)
+
+    def save_script(item: SyllabusItem, script: AnimationScript):
+        check_cancelled()
+        item.animation = script
+        checkpoint.save_unit("scripts", index_of[id(item)], script.model_dump())
 
-        # video scripts
+    check_cancelled()
+    if pending and LLM_PACKING:
+        PackedScriptGenerator(subject)(pending, on_result=save_script)
+    elif pending:
         script_generator = ScriptGenerator()
-        for item in syllabus_items:
-            item.animation = script_generator(subject, item)
-        # print(syllabus_items[:2])
+        for item in pending:
+            save_script(item, script_generator(subject, item))
+    # print(syllabus_items[:2])
 
+    check_cancelled()
     # convert to JSON for both file storage and neo4j
     json_syllabus = [i.model_dump() for i in syllabus_items]
-    
+
     # save syllabus JSON
-    os.makedirs("test_doc", exist_ok=True)
-    syllabus_file = f"./test_doc/syllabus_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(syllabus_file, "w", encoding="utf-8") as f:
-        json.dump(json_syllabus, f, ensure_ascii=False, indent=4)
+    output = checkpoint.load_stage("output")
+    if output is None:
+        os.makedirs("test_doc", exist_ok=True)
+        syllabus_file = f"./test_doc/syllabus_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(syllabus_file, "w", encoding="utf-8") as f:
+            json.dump(json_syllabus, f, ensure_ascii=False, indent=4)
+        checkpoint.save_stage("output", {"file": syllabus_file})
+    else:
+        syllabus_file = output["file"]
 
-    # neo4j visualization
+    # neo4j visualization, a failure here keeps the checkpoints so a resume only redoes this step
+    graph_pushed = False
     try:
         driver = get_driver()
         push_syllabus_to_neo4j(driver, json_syllabus)
         visualize_syllabus_graph(driver)
         driver.close()
+        graph_pushed = True
         print("[Pipeline] Neo4j graph updated and visualized")
     except Exception as e:
         print(f"[Pipeline] Neo4j step failed: {e}")
 
+    if graph_pushed or job_id is None:
+        checkpoint.clear()
+
     print(f"Pipeline complete. Syllabus saved at {syllabus_file}")
-    return {"file": syllabus_file, "data": json_syllabus}
+    return {"file": syllabus_file, "data": json_syllabus, "graph_pushed": graph_pushed}
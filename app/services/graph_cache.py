@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from app.config.config import GRAPH_CACHE_SIZE, GRAPH_CACHE_GENERATION_FILE
+
+
+class GraphReadCache:
+    """
+    LRU of serialized read results keyed by query. Every entry remembers the
+    generation it was read under; `invalidate` bumps the generation (in this
+    process and, through a shared file, in every process on the host) so no
+    entry read before a push is served after it.
+    """
+
+    def __init__(self, max_entries: int, generation_file: str):
+        self.max_entries = max_entries
+        self.generation_file = generation_file
+        self.entries: OrderedDict[Hashable, tuple[object, dict, str]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.local_generation = 0
+        self.metrics = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _generation(self) -> tuple[int, int, int]:
+        # the file grows by one byte per push, so (size, mtime) changes even within one mtime tick
+        try:
+            st = os.stat(self.generation_file)
+        except FileNotFoundError:
+            return self.local_generation, 0, 0
+        return self.local_generation, st.st_size, st.st_mtime_ns
+
+    def get(self, key: Hashable, load: Callable[[], object]) -> tuple[object, str]:
+        """Return (value, etag) for `key`, calling `load` only on a miss."""
+        generation = self._generation()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] == generation:
+                self.entries.move_to_end(key)
+                self.metrics["hits"] += 1
+                return entry[0], entry[2]
+            self.metrics["misses"] += 1
+
+        value = load()
+        body = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+        with self.lock:
+            self.entries[key] = (value, generation, etag)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value, etag
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            self.local_generation += 1
+            self.metrics["invalidations"] += 1
+        os.makedirs(os.path.dirname(self.generation_file) or ".", exist_ok=True)
+        with open(self.generation_file, "a", encoding="utf-8") as f:
+            f.write("\n")
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.metrics["hits"] + self.metrics["misses"]
+            return {
+                **self.metrics,
+                "entries": len(self.entries),
+                "hit_rate": round(self.metrics["hits"] / lookups, 3) if lookups else None,
+            }
+
+
+graph_cache = GraphReadCache(GRAPH_CACHE_SIZE, GRAPH_CACHE_GENERATION_FILE)
+
+def invalidate_graph_cache():
+    graph_cache.invalidate()
+
+def get_graph_cache_stats() -> dict:
+    return graph_cache.stats()
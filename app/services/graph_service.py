@@ -1,8 +1,17 @@
 import json
-from pyvis.network import Network
+from typing import Optional
+
+from app.services.graph_cache import invalidate_graph_cache
 
 
 def push_syllabus_to_neo4j(driver, syllabus_data):
+    try:
+        _push_syllabus(driver, syllabus_data)
+    finally:
+        # even a partial push changes what the read api would return
+        invalidate_graph_cache()
+
+def _push_syllabus(driver, syllabus_data):
     with driver.session() as session:
         
         # create constraints (only once, if not exist)
@@ -67,8 +76,82 @@ def push_syllabus_to_neo4j(driver, syllabus_data):
                 """, chapter_title=chapter_title, dep_title=dep)
 
 
+# read queries, every lookup starts from the unique (indexed) Unit / Chapter title
+
+def list_units(driver) -> list[dict]:
+    with driver.session() as session:
+        result = session.run("""
+            MATCH (u:Unit)
+            OPTIONAL MATCH (u)-[:HAS_CHAPTER]->(c:Chapter)
+            RETURN u.title AS title, u.number AS number, count(c) AS chapters
+            ORDER BY number, title
+        """)
+        return [record.data() for record in result]
+
+def list_chapters(driver, unit_title: Optional[str] = None) -> Optional[list[dict]]:
+    """Chapters of one unit (None if the unit does not exist) or of every unit."""
+    with driver.session() as session:
+        if unit_title is None:
+            result = session.run("""
+                MATCH (u:Unit)-[:HAS_CHAPTER]->(c:Chapter)
+                RETURN c.title AS title, u.title AS unit_title, u.number AS unit_number
+                ORDER BY unit_number, title
+            """)
+            return [record.data() for record in result]
+
+        record = session.run("""
+            MATCH (u:Unit {title: $unit_title})
+            OPTIONAL MATCH (u)-[:HAS_CHAPTER]->(c:Chapter)
+            WITH u, c ORDER BY c.title
+            RETURN u.number AS unit_number, collect(c.title) AS titles
+        """, unit_title=unit_title).single()
+        if record is None:
+            return None
+        return [
+            {"title": title, "unit_title": unit_title, "unit_number": record["unit_number"]}
+            for title in record["titles"]
+        ]
+
+def get_chapter(driver, chapter_title: str) -> Optional[dict]:
+    """Chapter properties with `qa` and `animation` decoded from their JSON strings, None if missing."""
+    with driver.session() as session:
+        record = session.run("""
+            MATCH (c:Chapter {title: $chapter_title})
+            OPTIONAL MATCH (u:Unit)-[:HAS_CHAPTER]->(c)
+            RETURN c, u.title AS unit_title
+            LIMIT 1
+        """, chapter_title=chapter_title).single()
+    if record is None:
+        return None
+    c = record["c"]
+    return {
+        "chapter": c["title"],
+        "unit_title": record["unit_title"],
+        "content": c.get("content", []),
+        "competencies": c.get("competencies", []),
+        "explanation": c.get("explanation", ""),
+        "qa": json.loads(c["qa_pairs"]) if c.get("qa_pairs") else None,
+        "animation": json.loads(c["animation_script"]) if c.get("animation_script") else None,
+    }
+
+def get_prerequisites(driver, chapter_title: str, max_depth: int = 1) -> Optional[list[dict]]:
+    """Chapters `chapter_title` depends on, up to `max_depth` hops away, nearest first. None if missing."""
+    with driver.session() as session:
+        # cypher does not accept a parameter as a path length bound
+        record = session.run(f"""
+            MATCH (c:Chapter {{title: $chapter_title}})
+            OPTIONAL MATCH p = (c)-[:DEPENDS_ON*1..{int(max_depth)}]->(dep:Chapter)
+            WITH c, dep, min(length(p)) AS depth
+            ORDER BY depth, dep.title
+            RETURN c.title AS title, collect({{title: dep.title, depth: depth}}) AS prerequisites
+        """, chapter_title=chapter_title).single()
+    if record is None:
+        return None
+    return [dep for dep in record["prerequisites"] if dep["title"] is not None]
+
 
 def visualize_syllabus_graph(driver, output_file="syllabus_graph.html"):
+    from pyvis.network import Network
     net = Network(height="750px", width="100%", directed=True)
 
     with driver.session() as session:
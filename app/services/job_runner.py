@@ -0,0 +1,113 @@
+import threading
+
+from app.config.config import DEPLOY_MODE, JOB_LEASE_SECONDS
+from app.utils.job_status import (
+    create_job, get_or_create_job, get_job, get_job_spec, transition_job, heartbeat_job, start_job_run,
+    JobStatus, JobCancelled,
+)
+
+
+def _run_syllabus(job_id: str, run_id: str, payload: dict):
+    from app.pipelines.syllabus_pipeline import process_syllabus_pipeline
+    return process_syllabus_pipeline(payload["subject"], payload["pdf_path"], job_id=job_id, run_id=run_id)
+
+def _run_manim(job_id: str, run_id: str, payload: dict):
+    from app.pipelines.manim_pipeline import process_manim_script_pipeline
+    syllabus_data = get_job(payload["syllabus_job_id"])["result"]["data"]
+    return process_manim_script_pipeline(payload["subject"], syllabus_data)
+
+JOB_HANDLERS = {
+    "syllabus": _run_syllabus,
+    "manim": _run_manim,
+}
+
+
+def run_job(job_id: str):
+    """Execute a submitted job in the current process and record its outcome."""
+    spec = get_job_spec(job_id)
+    if spec is None:
+        print(f"[Jobs] Job {job_id} not found, skipping")
+        return
+
+    # queue workers have already claimed the job (RUNNING), a cancelled job is left alone.
+    # every run gets its own id, an older run of the same job (cancelled then resumed,
+    # or reclaimed after its lease expired) notices it was superseded and stops
+    run_id = start_job_run(job_id)
+    if run_id is None:
+        print(f"[Jobs] Job {job_id} is {spec['status']}, skipping")
+        return
+
+    # keep the lease alive while the handler runs, so the job is only reclaimed if this process dies
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(job_id, run_id, stop), daemon=True)
+    beat.start()
+    try:
+        result = JOB_HANDLERS[spec["kind"]](job_id, run_id, spec["payload"])
+        outcome = {"status": JobStatus.COMPLETED, "result": result, "error": None}
+    except JobCancelled:
+        outcome = None
+    except Exception as e:
+        outcome = {"status": JobStatus.FAILED, "result": None, "error": str(e)}
+    finally:
+        stop.set()
+        beat.join()
+
+    # only the run that still owns the job may finish it, never over CANCELLED or a newer run
+    if outcome is None or not transition_job(job_id, (JobStatus.RUNNING,), current_run=run_id, **outcome):
+        print(f"[Jobs] Run {run_id} of job {job_id} was cancelled or superseded, result discarded")
+
+def _heartbeat(job_id: str, run_id: str, stop: threading.Event):
+    while not stop.wait(JOB_LEASE_SECONDS / 4):
+        try:
+            if not heartbeat_job(job_id, run_id):
+                return
+        except Exception as e:
+            # a busy database only delays this beat, the lease has room for a few misses
+            print(f"[Jobs] Heartbeat for {job_id} failed: {e}")
+
+def submit_job(kind: str, payload: dict, schedule) -> str:
+    """
+    Create a job and either hand it to `schedule` (inline mode, e.g.
+    `BackgroundTasks.add_task`) or leave it on the shared queue for worker.py.
+    """
+    job_id, _ = submit_job_once(kind, payload, schedule)
+    return job_id
+
+def submit_job_once(kind: str, payload: dict, schedule, dedup_key: str | None = None) -> tuple[str, bool]:
+    """
+    Like `submit_job`, but when a pending, running or completed job already exists
+    for `dedup_key` its id is returned instead of starting new work.
+    Returns (job_id, created).
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    queued = DEPLOY_MODE == "queue"
+    if dedup_key:
+        job_id, created = get_or_create_job(dedup_key, kind=kind, payload=payload, queued=queued)
+    else:
+        job_id, created = create_job(kind=kind, payload=payload, queued=queued), True
+
+    if created and not queued:
+        schedule(run_job, job_id)
+    return job_id, created
+
+def cancel_job(job_id: str) -> bool:
+    """
+    Mark a pending or running job CANCELLED. A running job stops at its next
+    checkpoint (see syllabus_pipeline). Returns False if the job already finished.
+    """
+    return transition_job(job_id, (JobStatus.PENDING, JobStatus.RUNNING), JobStatus.CANCELLED)
+
+def resume_job(job_id: str, schedule, from_statuses=(JobStatus.FAILED, JobStatus.CANCELLED)) -> bool:
+    """
+    Put a failed or cancelled job back to PENDING and schedule it like `submit_job`.
+    It runs under the same id, so its checkpoints are picked up and only missing
+    work is redone. Returns False if the job is not in one of `from_statuses`.
+    """
+    spec = get_job_spec(job_id)
+    if spec is None or not transition_job(job_id, from_statuses, JobStatus.PENDING):
+        return False
+    if not spec["queued"]:
+        schedule(run_job, job_id)
+    return True
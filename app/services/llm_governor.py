@@ -0,0 +1,221 @@
+import random
+import threading
+import time
+from app.config.config import (
+    LLM_PROVIDER_LIMITS,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+)
+
+# status codes and exception names treated as transient provider errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+RETRYABLE_NAMES = ("RateLimit", "Timeout", "APIConnectionError", "ServiceUnavailable", "InternalServerError")
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute; `take` blocks until enough are available."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, amount: float) -> float:
+        # a single request larger than the bucket would never fit, charge a full bucket instead
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: +1/limit per fast success, halved on a 429, timeout
+    or slow response (at most once per cooldown so a burst of errors counts once).
+    """
+
+    def __init__(self, maximum: int, target_latency: float, cooldown: float = 5.0):
+        self.maximum = max(1, maximum)
+        self.limit = float(max(1, maximum // 2))
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+
+    def acquire(self) -> float:
+        start = time.monotonic()
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+        return time.monotonic() - start
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify()
+
+    def on_success(self, latency: float):
+        if latency > self.target_latency:
+            self.on_congestion()
+            return
+        with self.cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self.cond.notify_all()
+
+    def on_congestion(self):
+        with self.cond:
+            now = time.monotonic()
+            if now - self.last_decrease >= self.cooldown:
+                self.limit = max(1.0, self.limit / 2)
+                self.last_decrease = now
+
+
+class ProviderGovernor:
+    def __init__(self, provider: str, rpm: int = 0, tpm: int = 0, max_concurrency: int = 8, target_latency: float = 120.0):
+        self.provider = provider
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency, target_latency)
+        self.lock = threading.Lock()
+        self.metrics = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "throttled_seconds": 0.0,
+            "backoff_seconds": 0.0,
+        }
+
+    def _count(self, key: str, amount=1):
+        with self.lock:
+            self.metrics[key] += amount
+
+    def call(self, fn, est_tokens: int = 0, has_fallback: bool = False):
+        """
+        Run `fn()` within this provider's limits, retrying transient errors with
+        jittered backoff. With `has_fallback` only 429s are retried here: a
+        timeout or server error is raised at once so the caller can move on to
+        its next model instead of waiting out this one's timeout again.
+        """
+        self._count("calls")
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            waited = 0.0
+            if self.requests:
+                waited += self.requests.take(1)
+            if self.tokens and est_tokens:
+                waited += self.tokens.take(est_tokens)
+            waited += self.concurrency.acquire()
+            self._count("throttled_seconds", waited)
+
+            start = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                self.concurrency.release()
+                status = error_status(e)
+                if status == 429 or is_timeout(e):
+                    if status == 429:
+                        self._count("rate_limited")
+                    self.concurrency.on_congestion()
+
+                retryable = status == 429 if has_fallback else is_retryable(e)
+                if not retryable or attempt == LLM_MAX_RETRIES:
+                    self._count("failed")
+                    raise
+
+                delay = retry_after(e)
+                if delay is None:
+                    # full jitter exponential backoff
+                    delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+                print(f"[LLM] {self.provider} transient error ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+                self._count("retries")
+                self._count("backoff_seconds", delay)
+                time.sleep(delay)
+                continue
+
+            self.concurrency.release()
+            self.concurrency.on_success(time.monotonic() - start)
+            self._count("succeeded")
+            return result
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            data = {k: round(v, 3) if isinstance(v, float) else v for k, v in self.metrics.items()}
+        data["concurrency_limit"] = int(self.concurrency.limit)
+        data["in_flight"] = self.concurrency.in_flight
+        return data
+
+
+def _error_chain(e: BaseException):
+    # dspy adapters may wrap the provider error, so look through causes as well
+    seen = set()
+    while e is not None and id(e) not in seen:
+        seen.add(id(e))
+        yield e
+        e = e.__cause__ or e.__context__
+
+def error_status(e: BaseException):
+    for err in _error_chain(e):
+        status = getattr(err, "status_code", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+def is_timeout(e: BaseException) -> bool:
+    return any(isinstance(err, TimeoutError) or "Timeout" in type(err).__name__ for err in _error_chain(e))
+
+def is_retryable(e: BaseException) -> bool:
+    if error_status(e) in RETRYABLE_STATUS or is_timeout(e):
+        return True
+    return any(
+        isinstance(err, ConnectionError) or any(name in type(err).__name__ for name in RETRYABLE_NAMES)
+        for err in _error_chain(e)
+    )
+
+def retry_after(e: BaseException):
+    """Seconds to wait as requested by the provider's Retry-After headers, if any."""
+    for err in _error_chain(e):
+        response = getattr(err, "response", None)
+        headers = getattr(response, "headers", None) or getattr(err, "litellm_response_headers", None) or {}
+        try:
+            if headers.get("retry-after-ms"):
+                return min(LLM_RETRY_MAX_DELAY, float(headers["retry-after-ms"]) / 1000)
+            if headers.get("retry-after"):
+                return min(LLM_RETRY_MAX_DELAY, float(headers["retry-after"]))
+        except (TypeError, ValueError):
+            # http-date form of Retry-After, fall back to our own backoff
+            pass
+    return None
+
+
+_governors: dict[str, ProviderGovernor] = {}
+_governors_lock = threading.Lock()
+
+def get_governor(provider: str) -> ProviderGovernor:
+    with _governors_lock:
+        if provider not in _governors:
+            _governors[provider] = ProviderGovernor(provider, **LLM_PROVIDER_LIMITS.get(provider, {}))
+        return _governors[provider]
+
+def governed_call(provider: str, fn, est_tokens: int = 0, has_fallback: bool = False):
+    return get_governor(provider).call(fn, est_tokens, has_fallback)
+
+def get_llm_metrics() -> dict:
+    with _governors_lock:
+        governors = list(_governors.values())
+    return {g.provider: g.snapshot() for g in governors}
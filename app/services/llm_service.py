@@ -4,9 +4,12 @@ from app.models.syllabus_models import (
     SyllabusItem, 
     ChapterQA,  
     AnimationScript,
+    ScriptTopic,
 )
 from app.models.manim_models import ImprovementResult
 from app.utils.code_parser import extract_code_blocks
+from app.services.model_router import call_stage
+from app.config.config import LLM_PACK_TOKEN_BUDGET, LLM_PACK_MAX_CHAPTERS
 
 # dspy signatures
 class SyllabusExtractionSignature(dspy.Signature):
@@ -124,6 +127,66 @@ class ScriptGenerationSignature(dspy.Signature):
         )
     )
 
+class PackedQAGenerationSignature(dspy.Signature):
+    """
+    Generate concept-focused question–answer pairs for each of several chapters in one pass.
+    Return exactly one `ChapterQA` per input item, in the same order as the input.
+    """
+    items: List[SyllabusItem] = dspy.InputField(
+        desc=(
+            "A list of structured `SyllabusItem` objects, one per chapter, each containing:\n"
+            "- `unit_title`, `unit_number`: The unit the chapter belongs to.\n"
+            "- `chapter`: The specific chapter title.\n"
+            "- `content`: The main topics and subtopics in the chapter.\n"
+            "- `competencies`: Key learning objectives.\n"
+            "- `explanation`: A brief conceptual overview.\n"
+            "Questions for a chapter must only use that chapter's `content` and `competencies`."
+        )
+    )
+    qa_list: List[ChapterQA] = dspy.OutputField(
+        desc=(
+            "A list with one `ChapterQA` object per input item, in input order, each containing:\n"
+            "- `chapter`: The chapter title copied exactly from the input item.\n"
+            "- `qa_pairs`: A list of 5 to 8 (as required by content and competencies) detailed `QuestionAnswerPair` objects, each with:\n"
+            "   * `question`: A concept-testing question based on the chapter content.\n"
+            "   * `answer`: A clear, explanatory answer that reinforces understanding."
+        )
+    )
+
+class PackedScriptGenerationSignature(dspy.Signature):
+    """
+    Generate a complete 2–3 minute animation script, in the style of 3Blue1Brown,
+    for each of several topics in one pass.
+    Return exactly one `AnimationScript` per input topic, in the same order as the input.
+    """
+    subject: str = dspy.InputField(
+        desc=(
+            "The broad subject or academic domain, e.g., 'Mathematics', 'Physics', or 'Computer Science'. "
+            "Used to define the tone, level, and style of explanation."
+        )
+    )
+    topics: List[ScriptTopic] = dspy.InputField(
+        desc=(
+            "A list of `ScriptTopic` objects, each containing:\n"
+            "- `topic`: The chapter being explained.\n"
+            "- `brief_insight`: A short conceptual summary of its central idea.\n"
+            "- `key_concepts`: The subtopics or core ideas that should appear in its video."
+        )
+    )
+    scripts: List[AnimationScript] = dspy.OutputField(
+        desc=(
+            "A list with one `AnimationScript` object per input topic, in input order, each containing:\n"
+            "- `title`: The topic copied exactly from the input.\n"
+            "- `narration`: The full narration text timed for 2–3 minutes of speech.\n"
+            "- `visual_elements`: A list of `VisualElement` items, each with:\n"
+            "    * `timestamp`: A timestamp (e.g., '00:10').\n"
+            "    * `description`: A short visual cue, like 'Show parabola opening upward'.\n"
+            "- `equations`: A list of equations displayed during the video.\n"
+            "- `key_timestamps`: A mapping of labeled transitions (e.g., {'Intro': '00:00', 'Key insight': '01:15'}).\n"
+            "- `visual_style`: A short description of the artistic tone, e.g., 'minimal vector style'."
+        )
+    )
+
 class ManimGenerationSignature(dspy.Signature):
     """
     Generate a short (30–60 second), fully functional Manim animation script 
@@ -214,33 +277,41 @@ class ImprovementSignature(dspy.Signature):
 
 # dspy modules
 class SyllabusExtractor(dspy.Module):
+    stage = "extraction"
+
     def __init__(self):
         super().__init__()
         self.predict = dspy.Predict(SyllabusExtractionSignature)
 
     def forward(self, text):
-        result = self.predict(text=text)
+        result = call_stage(self.stage, self.predict, text=text)
         return result.syllabus
 
 class ChapterDependencyFinder(dspy.Module):
+    stage = "dependencies"
+
     def __init__(self):
         super().__init__()
         self.predict = dspy.Predict(ChapterDependencySignature)
 
     def forward(self, chapter, chapter_list):
-        result = self.predict(chapter=chapter, chapter_list=chapter_list)
+        result = call_stage(self.stage, self.predict, chapter=chapter, chapter_list=chapter_list)
         return result.dependencies
 
 class QAGenerator(dspy.Module):
+    stage = "qa"
+
     def __init__(self):
         super().__init__()
         self.predict = dspy.Predict(QAGenerationSignature)
 
     def forward(self, item: SyllabusItem) -> ChapterQA:
-        result = self.predict(item=item)
+        result = call_stage(self.stage, self.predict, item=item)
         return result.qa
 
 class ScriptGenerator(dspy.Module):
+    stage = "scripts"
+
     def __init__(self):
         super().__init__()
         self.predict = dspy.Predict(ScriptGenerationSignature)
@@ -250,7 +321,9 @@ class ScriptGenerator(dspy.Module):
         brief_insight = item.explanation
         key_concepts = item.content
 
-        result = self.predict(
+        result = call_stage(
+            self.stage,
+            self.predict,
             subject=subject,
             topic=topic,
             brief_insight=brief_insight,
@@ -258,7 +331,136 @@ class ScriptGenerator(dspy.Module):
         )
         return result.script
 
+def _estimate_tokens(obj) -> int:
+    # ~4 characters per token
+    text = obj.model_dump_json() if hasattr(obj, "model_dump_json") else str(obj)
+    return len(text) // 4
+
+def pack_by_budget(items: list, output_tokens_per_item: int) -> list[list[int]]:
+    """
+    Greedily group item indexes so each batch's estimated prompt + completion
+    size stays within LLM_PACK_TOKEN_BUDGET (and at most LLM_PACK_MAX_CHAPTERS items).
+    """
+    batches, current, used = [], [], 0
+    for idx, item in enumerate(items):
+        cost = _estimate_tokens(item) + output_tokens_per_item
+        if current and (used + cost > LLM_PACK_TOKEN_BUDGET or len(current) >= LLM_PACK_MAX_CHAPTERS):
+            batches.append(current)
+            current, used = [], 0
+        current.append(idx)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def _match_packed(titles: list[str], outputs: list, output_title) -> list | None:
+    """
+    Check packed outputs position by position against the requested `titles`
+    (chapter titles may repeat across units, so they cannot be keys). None when
+    the batch came back short, long, reordered or retitled, so it gets split.
+    """
+    if not outputs or len(outputs) != len(titles):
+        return None
+    key = lambda t: " ".join(str(t).split()).casefold()
+    if any(key(output_title(o)) != key(t) for t, o in zip(titles, outputs)):
+        return None
+    return list(outputs)
+
+class PackedGenerator(dspy.Module):
+    """
+    Runs one per-chapter generator over many chapters, sending several
+    chapters per llm call. A batch that fails, is truncated or comes back with
+    the wrong number of results is split in half and retried, down to the
+    single-chapter generator.
+
+    Subclasses set `stage` and implement `_call_packed(batch)`,
+    `_call_single(item)`, `_title(item)` and `_output_title(output)`.
+    """
+    # model_router stage used for both packed and single-chapter calls
+    stage: str
+    output_tokens_per_item = 1000
+
+    def _run(self, batch: list, on_result=None) -> list:
+        if len(batch) == 1:
+            results = [self._call_single(batch[0])]
+        else:
+            try:
+                results = _match_packed([self._title(i) for i in batch], self._call_packed(batch), self._output_title)
+            except Exception as e:
+                print(f"[LLM] Packed {self.stage} batch of {len(batch)} failed: {e}")
+                results = None
+
+            if results is None:
+                mid = len(batch) // 2
+                print(f"[LLM] Splitting {self.stage} batch of {len(batch)} into {mid} + {len(batch) - mid}")
+                return self._run(batch[:mid], on_result) + self._run(batch[mid:], on_result)
+
+        if on_result:
+            for item, result in zip(batch, results):
+                on_result(item, result)
+        return results
+
+    def forward(self, items: list, on_result=None) -> list:
+        results = []
+        batches = pack_by_budget([self._pack_input(i) for i in items], self.output_tokens_per_item)
+        for batch in batches:
+            results.extend(self._run([items[idx] for idx in batch], on_result))
+        print(f"[LLM] {self.stage}: {len(items)} chapters in {len(batches)} packed batches")
+        return results
+
+    def _pack_input(self, item):
+        return item
+
+class PackedQAGenerator(PackedGenerator):
+    stage = "qa"
+    output_tokens_per_item = 900
+
+    def __init__(self):
+        super().__init__()
+        self.predict = dspy.Predict(PackedQAGenerationSignature)
+        self.single = QAGenerator()
+
+    def _call_packed(self, batch: list[SyllabusItem]) -> list[ChapterQA]:
+        return call_stage(self.stage, self.predict, items=batch).qa_list
+
+    def _call_single(self, item: SyllabusItem) -> ChapterQA:
+        return self.single(item)
+
+    def _title(self, item: SyllabusItem) -> str:
+        return item.chapter
+
+    def _output_title(self, output: ChapterQA) -> str:
+        return output.chapter
+
+class PackedScriptGenerator(PackedGenerator):
+    stage = "scripts"
+    output_tokens_per_item = 1500
+
+    def __init__(self, subject: str):
+        super().__init__()
+        self.subject = subject
+        self.predict = dspy.Predict(PackedScriptGenerationSignature)
+        self.single = ScriptGenerator()
+
+    def _pack_input(self, item: SyllabusItem) -> ScriptTopic:
+        return ScriptTopic(topic=item.chapter, brief_insight=item.explanation, key_concepts=item.content)
+
+    def _call_packed(self, batch: list[SyllabusItem]) -> list[AnimationScript]:
+        topics = [self._pack_input(i) for i in batch]
+        return call_stage(self.stage, self.predict, subject=self.subject, topics=topics).scripts
+
+    def _call_single(self, item: SyllabusItem) -> AnimationScript:
+        return self.single(self.subject, item)
+
+    def _title(self, item: SyllabusItem) -> str:
+        return item.chapter
+
+    def _output_title(self, output: AnimationScript) -> str:
+        return output.title
+
 class ManimGenerator(dspy.Module):
+    stage = "manim_generation"
+
     def __init__(self):
         super().__init__()
         self.predict = dspy.Predict(ManimGenerationSignature)
@@ -271,7 +473,9 @@ class ManimGenerator(dspy.Module):
         equations_text = script.equations
         timestamps = script.key_timestamps
 
-        result = self.predict(
+        result = call_stage(
+            self.stage,
+            self.predict,
             subject=subject,
             topic=topic,
             title=script.title,
@@ -285,6 +489,8 @@ class ManimGenerator(dspy.Module):
         return result.manim_code
 
 class ImproveCodeOnce(dspy.Module):
+    stage = "manim_improvement"
+
     def __init__(self):
         super().__init__()
         self.predict = dspy.Predict(ImprovementSignature)
@@ -293,7 +499,9 @@ class ImproveCodeOnce(dspy.Module):
         # avoid sending large base64 blobs just send a summary
         frame_summary = f"{len(base64_frames)} frames provided." if base64_frames else "No frames provided."
 
-        result = self.predict(
+        result = call_stage(
+            self.stage,
+            self.predict,
             executed_code=executed_code,
             logs=logs,
             errors=errors,
@@ -0,0 +1,239 @@
+import ast
+import re
+from pathlib import Path
+
+# deprecated manim names -> (replacement, extra keyword arguments keeping the old behaviour)
+DEPRECATED_NAMES = {
+    "ShowCreation": ("Create", None),
+    "TextMobject": ("Tex", None),
+    "TexMobject": ("MathTex", None),
+    "FadeInFromDown": ("FadeIn", "shift=UP"),
+    "FadeOutAndShiftDown": ("FadeOut", "shift=DOWN"),
+    "FadeInFromLarge": ("FadeIn", "scale=2"),
+}
+
+TEX_CLASSES = {"MathTex", "Tex", "SingleStringMathTex"}
+
+NAME_ERROR = re.compile(r"NameError: name '(\w+)' is not defined")
+IMPORT_ERROR = re.compile(r"ImportError: cannot import name '(\w+)'")
+UNEXPECTED_KWARG = re.compile(r"([\w.]+)\(\) got an unexpected keyword argument '(\w+)'")
+# plain tracebacks (render pool) and rich tracebacks (manim cli)
+TRACEBACK_FRAME = re.compile(r'File "([^"]+)", line (\d+)|(\S+\.py):(\d+) in \w+')
+LIBRARY_PATH = re.compile(r"site-packages|dist-packages|[/\\]lib[/\\]python")
+# frames of our own render code (e.g. render_pool exec'ing the script) are not the script either
+APP_DIR = str(Path(__file__).resolve().parents[1])
+LATEX_ERROR = re.compile(
+    r"LaTeX compilation error|latex error converting to dvi|Undefined control sequence"
+    r"|Missing \$ inserted|invalid escape sequence",
+    re.IGNORECASE,
+)
+
+
+def _line_offsets(src: bytes) -> list[int]:
+    offsets, pos = [0], 0
+    for line in src.splitlines(keepends=True):
+        pos += len(line)
+        offsets.append(pos)
+    return offsets
+
+def _apply_edits(code: str, edits: list[tuple]) -> str:
+    """
+    Apply (lineno, col, end_lineno, end_col, text) replacements given in ast
+    coordinates (col offsets are utf-8 byte offsets) without touching comments.
+    Overlapping deletions are merged; any other edit overlapping one already
+    taken is dropped.
+    """
+    src = code.encode("utf-8")
+    offsets = _line_offsets(src)
+    spans = []
+    for start, end, text in sorted((offsets[l - 1] + c, offsets[el - 1] + ec, text) for l, c, el, ec, text in edits):
+        if spans and start < spans[-1][1]:
+            if not text and not spans[-1][2]:
+                spans[-1] = (spans[-1][0], max(end, spans[-1][1]), "")
+            continue
+        spans.append((start, end, text))
+    for start, end, text in reversed(spans):
+        src = src[:start] + text.encode("utf-8") + src[end:]
+    return src.decode("utf-8")
+
+def _callee_name(call: ast.Call):
+    if isinstance(call.func, ast.Name):
+        return call.func.id
+    if isinstance(call.func, ast.Attribute):
+        return call.func.attr
+    return None
+
+def _has_manim_star_import(tree: ast.Module) -> bool:
+    return any(
+        isinstance(node, ast.ImportFrom) and node.module == "manim" and any(a.name == "*" for a in node.names)
+        for node in tree.body
+    )
+
+
+# rules: each takes (code, tree, errors) and returns the rewritten code or None when it does not apply
+def fix_missing_manim_import(code: str, tree: ast.Module, errors: str):
+    if not NAME_ERROR.search(errors) or _has_manim_star_import(tree):
+        return None
+
+    # insert after a module docstring and `from __future__` imports
+    line = 0
+    for node in tree.body:
+        is_docstring = isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+        is_future = isinstance(node, ast.ImportFrom) and node.module == "__future__"
+        if (is_docstring and line == 0) or is_future:
+            line = node.end_lineno
+            continue
+        break
+
+    lines = code.splitlines(keepends=True)
+    if line and not lines[line - 1].endswith("\n"):
+        lines[line - 1] += "\n"
+    lines.insert(line, "from manim import *\n")
+    return "".join(lines)
+
+def fix_deprecated_names(code: str, tree: ast.Module, errors: str):
+    missing = set(NAME_ERROR.findall(errors)) | set(IMPORT_ERROR.findall(errors))
+    targets = {name for name in missing if name in DEPRECATED_NAMES}
+    if not targets:
+        return None
+
+    edits = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in targets:
+            extra = DEPRECATED_NAMES[node.func.id][1]
+            if extra and (node.args or node.keywords):
+                last = max(node.args + node.keywords, key=lambda n: (n.end_lineno, n.end_col_offset))
+                edits.append((last.end_lineno, last.end_col_offset, last.end_lineno, last.end_col_offset, f", {extra}"))
+        if isinstance(node, ast.Name) and node.id in targets:
+            new = DEPRECATED_NAMES[node.id][0]
+            edits.append((node.lineno, node.col_offset, node.end_lineno, node.end_col_offset, new))
+        if isinstance(node, ast.alias) and node.name in targets:
+            new = DEPRECATED_NAMES[node.name][0]
+            edits.append((node.lineno, node.col_offset, node.lineno, node.col_offset + len(node.name), new))
+
+    return _apply_edits(code, edits) if edits else None
+
+def _script_error_line(errors: str):
+    """Line of the innermost traceback frame outside installed libraries, i.e. in the generated script."""
+    line = None
+    for match in TRACEBACK_FRAME.finditer(errors):
+        path, lineno = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        if not LIBRARY_PATH.search(path) and not path.startswith(APP_DIR):
+            line = int(lineno)
+    return line
+
+def fix_unexpected_kwargs(code: str, tree: ast.Module, errors: str):
+    error_line = _script_error_line(errors)
+    # several errors can name keywords of the same call, they are removed together
+    flagged: dict[int, tuple[ast.Call, set]] = {}
+    for qualname, kwarg in set(UNEXPECTED_KWARG.findall(errors)):
+        # "Circle.__init__" -> "Circle", "Scene.play" -> "play"
+        parts = [p for p in qualname.split(".") if p != "__init__"]
+        callee = parts[-1] if parts else None
+
+        calls = [
+            node for node in ast.walk(tree)
+            if isinstance(node, ast.Call) and any(k.arg == kwarg for k in node.keywords)
+        ]
+        named = [c for c in calls if _callee_name(c) == callee]
+        if not named:
+            # errors raised from a base class __init__ (e.g. VMobject) name a class the script never
+            # calls; only the call the traceback points at is edited, never every call using the kwarg
+            named = [c for c in calls if error_line is not None and c.lineno <= error_line <= c.end_lineno]
+        for call in named:
+            flagged.setdefault(id(call), (call, set()))[1].add(kwarg)
+
+    edits = []
+    for call, kwargs in flagged.values():
+        args = sorted(call.args + call.keywords, key=lambda n: (n.lineno, n.col_offset))
+        kept = [n for n in args if not (isinstance(n, ast.keyword) and n.arg in kwargs)]
+        for idx, node in enumerate(args):
+            if node in kept:
+                continue
+            before = [n for n in args[:idx] if n in kept]
+            after = [n for n in args[idx + 1:] if n in kept]
+            if before:
+                # from the end of the previous kept argument, taking the comma with it
+                prev = before[-1]
+                edits.append((prev.end_lineno, prev.end_col_offset, node.end_lineno, node.end_col_offset, ""))
+            elif after:
+                nxt = after[0]
+                edits.append((node.lineno, node.col_offset, nxt.lineno, nxt.col_offset, ""))
+            else:
+                first, last = args[0], args[-1]
+                edits.append((first.lineno, first.col_offset, last.end_lineno, last.end_col_offset, ""))
+
+    if not edits:
+        return None
+    fixed = _apply_edits(code, edits)
+    try:
+        ast.parse(fixed)
+    except SyntaxError:
+        # leave it to the llm improver rather than hand it a broken script
+        return None
+    return fixed
+
+def _as_raw_tex_literal(segment: str, strip_dollars: bool):
+    match = re.match(r"([a-zA-Z]*)('''|\"\"\"|'|\")(.*)\2$", segment, re.DOTALL)
+    if not match:
+        return None
+    prefix, quote, body = match.groups()
+    if any(c in prefix.lower() for c in "fb"):
+        return None
+
+    raw = "r" in prefix.lower()
+    if not raw:
+        # quote escapes and trailing backslashes cannot be expressed in a raw literal
+        if "\\" + quote[0] in body or body.endswith("\\"):
+            return None
+        body = body.replace("\\\\", "\\")
+    if strip_dollars:
+        body = body.replace("$", "")
+
+    new = f"r{quote}{body}{quote}"
+    return new if new != segment else None
+
+def fix_tex_escaping(code: str, tree: ast.Module, errors: str):
+    if not LATEX_ERROR.search(errors):
+        return None
+
+    edits = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and _callee_name(node) in TEX_CLASSES):
+            continue
+        for arg in node.args:
+            if not (isinstance(arg, ast.Constant) and isinstance(arg.value, str)):
+                continue
+            segment = ast.get_source_segment(code, arg)
+            # MathTex is already in math mode, a literal $ breaks compilation
+            new = segment and _as_raw_tex_literal(segment, strip_dollars=_callee_name(node) != "Tex")
+            if new:
+                edits.append((arg.lineno, arg.col_offset, arg.end_lineno, arg.end_col_offset, new))
+
+    return _apply_edits(code, edits) if edits else None
+
+FIX_RULES = [
+    ("missing_manim_import", fix_missing_manim_import),
+    ("deprecated_names", fix_deprecated_names),
+    ("unexpected_kwargs", fix_unexpected_kwargs),
+    ("tex_escaping", fix_tex_escaping),
+]
+
+
+def apply_fix_rules(code: str, errors: str) -> tuple[str, list[str]]:
+    """
+    Match known Manim failure signatures in `errors` and rewrite `code` locally.
+    Returns the (possibly unchanged) code and the names of the rules that fired;
+    an empty list means the caller should fall back to the LLM improver.
+    """
+    fired = []
+    for name, rule in FIX_RULES:
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            break
+        new_code = rule(code, tree, errors)
+        if new_code is not None and new_code != code:
+            code = new_code
+            fired.append(name)
+    return code, fired
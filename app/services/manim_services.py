@@ -1,10 +1,35 @@
-import subprocess
-import cv2
 import base64
+import importlib.util
 from pathlib import Path
 import shutil
 
-def execute_manim(file_path: str):
+from app.config.config import MANIM_RENDER_MODE
+from app.services.tex_cache import tex_cache_config_file, prune_tex_cache
+from app.services.render_logs import log_paths, run_captured
+
+def execute_manim(file_path: str, log_prefix: str | None = None):
+    """
+    Render `file_path`. stdout / stderr are streamed to `<log_prefix>.stdout.log`
+    and `.stderr.log` (default `<dir>/logs/<script stem>`); the result only
+    carries their last RENDER_LOG_TAIL_CHARS characters.
+    """
+    # every render shares the content-addressed tex cache, keep it within its size cap
+    try:
+        return _execute_manim(file_path, log_prefix)
+    finally:
+        prune_tex_cache()
+
+def _execute_manim(file_path: str, log_prefix: str | None):
+    if MANIM_RENDER_MODE == "pool":
+        if importlib.util.find_spec("manim") is None:
+            return {
+                "stdout": "",
+                "stderr": "Manim not found in current environment",
+                "returncode": -1
+            }
+        from app.services.render_pool import get_render_pool
+        return get_render_pool().render(file_path, quality="high_quality", log_prefix=log_prefix)
+
     manim_path = shutil.which("manim")
     if not manim_path:
         return {
@@ -13,26 +38,29 @@ def execute_manim(file_path: str):
             "returncode": -1
         }
 
-    cmd = f"{manim_path} -pqh {file_path}"
-
-    result = subprocess.run(
-        cmd,
-        shell=True,
-        capture_output=True,
-        text=True,
-        executable="/bin/bash"
+    # media next to the script and the video named after it (not the Scene class),
+    # which is where get_manim_video_path and the retention policy look for it
+    media_dir = Path(file_path).parent / "media"
+    cmd = (
+        f"{manim_path} -pqh --config_file {tex_cache_config_file()} "
+        f"--media_dir {media_dir} -o {Path(file_path).stem} {file_path}"
     )
 
-    return {
-        "stdout": result.stdout,
-        "stderr": result.stderr,
-        "returncode": result.returncode
-    }
+    return run_captured(cmd, *log_paths(file_path, log_prefix))
+
+def warm_tex_cache(equations: list[str]):
+    """Pre-compile equations into the shared tex cache (render pool mode only)."""
+    if MANIM_RENDER_MODE != "pool" or not equations or importlib.util.find_spec("manim") is None:
+        return
+    from app.services.render_pool import get_render_pool
+    result = get_render_pool().warm_tex(equations)
+    print(f"[TexCache] {result['stdout']}")
 
 def get_frames_from_video(video_path: str, stride: int = 25) -> list[str]:
     """Extract every Nth frame from a video as base64-encoded JPEGs."""
     if not Path(video_path).exists():
         return []
+    import cv2
     video = cv2.VideoCapture(video_path)
     frames = []
     i = 0
@@ -0,0 +1,54 @@
+import threading
+import dspy
+from app.config.config import LLM_MODELS, LLM_STAGE_ROUTES, LLM_EST_OUTPUT_TOKENS
+from app.services.llm_governor import governed_call
+
+_lms: dict[str, dspy.LM] = {}
+_lms_lock = threading.Lock()
+
+
+def get_lm(profile: str) -> dspy.LM:
+    """Build (once) the dspy LM for a named profile in `LLM_MODELS`."""
+    with _lms_lock:
+        if profile not in _lms:
+            if profile not in LLM_MODELS:
+                raise ValueError(f"Unknown LLM profile: {profile}")
+            lm_kwargs = {k: v for k, v in LLM_MODELS[profile].items() if k != "provider"}
+            # retries are handled by llm_governor, not inside litellm
+            _lms[profile] = dspy.LM(num_retries=0, **lm_kwargs)
+        return _lms[profile]
+
+def stage_route(stage: str) -> list[str]:
+    route = LLM_STAGE_ROUTES.get(stage)
+    if not route:
+        raise ValueError(f"No LLM route configured for stage: {stage}")
+    return route
+
+def estimate_tokens(kwargs: dict) -> int:
+    # ~4 characters per token for the inputs, plus the expected completion
+    return len(str(kwargs)) // 4 + LLM_EST_OUTPUT_TOKENS
+
+def call_stage(stage: str, predict, **kwargs):
+    """
+    Run `predict(**kwargs)` with the models routed to `stage`, moving down the
+    fallback chain when a model errors, times out or returns unparsable output.
+    Each attempt goes through the provider's rate limiter in llm_governor; only
+    the last model in the chain retries anything other than a 429.
+    """
+    est_tokens = estimate_tokens(kwargs)
+
+    def attempt(lm):
+        with dspy.context(lm=lm):
+            return predict(**kwargs)
+
+    last_error = None
+    route = stage_route(stage)
+    for i, profile in enumerate(route):
+        lm = get_lm(profile)
+        provider = LLM_MODELS[profile].get("provider", profile)
+        try:
+            return governed_call(provider, lambda: attempt(lm), est_tokens, has_fallback=i < len(route) - 1)
+        except Exception as e:
+            print(f"[LLM] Stage '{stage}' failed on {profile}: {e}")
+            last_error = e
+    raise last_error
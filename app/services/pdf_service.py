@@ -1,11 +1,11 @@
 import re
-import pdfplumber
 import os
 
 
 def extract_syllabus_text(pdf_filepath: str) -> str:
     if not os.path.exists(pdf_filepath):
         raise FileNotFoundError(f"File not found: {pdf_filepath}")
+    import pdfplumber
 
     pattern = re.compile(r"syllabus|contents|curriculum|chapters|index|unit", re.IGNORECASE)
     syllabus_pages = []
@@ -0,0 +1,101 @@
+import io
+import subprocess
+import threading
+from collections import deque
+from pathlib import Path
+
+from app.config.config import RENDER_LOG_TAIL_CHARS
+
+# imported by render pool workers, keep it light
+
+PUMP_CHUNK = 64 * 1024
+
+
+def log_paths(file_path: str, prefix: str | None = None) -> tuple[str, str]:
+    """(stdout, stderr) log files for a render, `<dir>/logs/<script stem>` unless a prefix is given."""
+    if prefix is None:
+        prefix = str(Path(file_path).parent / "logs" / Path(file_path).stem)
+    Path(prefix).parent.mkdir(parents=True, exist_ok=True)
+    return f"{prefix}.stdout.log", f"{prefix}.stderr.log"
+
+
+class LogCapture(io.TextIOBase):
+    """
+    Text sink that writes everything to `path` and keeps only the last
+    `tail_chars` characters in memory, so a chatty render cannot grow the
+    process no matter how much it logs.
+    """
+
+    def __init__(self, path: str, tail_chars: int = RENDER_LOG_TAIL_CHARS):
+        super().__init__()
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8", errors="replace")
+        self.tail_chars = tail_chars
+        self.chunks: deque[str] = deque()
+        self.size = 0
+        self.total = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        self.file.write(s)
+        self.total += len(s)
+        self.chunks.append(s)
+        self.size += len(s)
+        while len(self.chunks) > 1 and self.size - len(self.chunks[0]) >= self.tail_chars:
+            self.size -= len(self.chunks.popleft())
+        return len(s)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+    def tail(self) -> str:
+        text = "".join(self.chunks)[-self.tail_chars:] if self.tail_chars else ""
+        if self.total > len(text):
+            return f"[... {self.total - len(text)} earlier characters in {self.path}]\n{text}"
+        return text
+
+
+def _pump(stream, capture: LogCapture):
+    for chunk in iter(lambda: stream.read(PUMP_CHUNK), ""):
+        capture.write(chunk)
+    stream.close()
+
+def run_captured(cmd: str, stdout_log: str, stderr_log: str) -> dict:
+    """Run a shell command streaming its output to log files; returns the usual render result with log tails."""
+    out, err = LogCapture(stdout_log), LogCapture(stderr_log)
+    try:
+        process = subprocess.Popen(
+            cmd,
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            executable="/bin/bash",
+        )
+        pumps = [
+            threading.Thread(target=_pump, args=(process.stdout, out), daemon=True),
+            threading.Thread(target=_pump, args=(process.stderr, err), daemon=True),
+        ]
+        for t in pumps:
+            t.start()
+        returncode = process.wait()
+        for t in pumps:
+            t.join()
+    finally:
+        out.close()
+        err.close()
+
+    return {
+        "stdout": out.tail(),
+        "stderr": err.tail(),
+        "returncode": returncode,
+        "stdout_log": stdout_log,
+        "stderr_log": stderr_log,
+    }
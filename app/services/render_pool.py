@@ -0,0 +1,257 @@
+import atexit
+import contextlib
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import threading
+import traceback
+import types
+from pathlib import Path
+
+from app.config.config import (
+    RENDER_POOL_SIZE,
+    RENDER_MAX_RENDERS_PER_WORKER,
+    RENDER_MAX_RSS_MB,
+    RENDER_TIMEOUT,
+)
+from app.services.tex_cache import tex_cache_dir, install_tex_cache_hook
+from app.services.render_logs import LogCapture, log_paths
+
+# this module is imported by spawned workers, keep its top-level imports light
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # peak rss, in KB on linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def render_scene_file(
+    file_path: str,
+    quality: str = "high_quality",
+    config_overrides: dict | None = None,
+    log_prefix: str | None = None,
+) -> dict:
+    """
+    Render every Scene defined in `file_path` in the current (warm) interpreter.
+    The script runs in a fresh module namespace and manim's global config is
+    restored after each render. Output goes to log files (see render_logs),
+    only their tails are returned.
+    """
+    import manim
+
+    stdout_log, stderr_log = log_paths(file_path, log_prefix)
+    stdout, stderr = LogCapture(stdout_log), LogCapture(stderr_log)
+    module_name = f"_professorai_scene_{os.getpid()}_{Path(file_path).stem}"
+    module = types.ModuleType(module_name)
+    module.__file__ = file_path
+    returncode = 0
+
+    render_config = {
+        "quality": quality,
+        "input_file": file_path,
+        "media_dir": str(Path(file_path).parent / "media"),
+        "preview": False,
+        "write_to_movie": True,
+        "tex_dir": str(tex_cache_dir()),
+        # the tex dir is shared, see tex_cache
+        "no_latex_cleanup": True,
+    }
+    render_config.update(config_overrides or {})
+
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            # the snapshot is taken before any script code runs, so module-level
+            # `config.background_color = ...` lines are rolled back for the next render
+            with manim.tempconfig(render_config):
+                source = Path(file_path).read_text(encoding="utf-8")
+                sys.modules[module_name] = module
+                exec(compile(source, file_path, "exec"), module.__dict__)
+
+                scenes = [
+                    obj for obj in vars(module).values()
+                    if isinstance(obj, type) and issubclass(obj, manim.Scene) and obj.__module__ == module_name
+                ]
+                if not scenes:
+                    raise RuntimeError(f"No Scene subclass found in {file_path}")
+
+                # re-applied so the script cannot move outputs away from where the pipeline looks
+                scene_config = dict(render_config)
+                if len(scenes) == 1:
+                    # name the video after the script, like get_manim_video_path expects
+                    scene_config.setdefault("output_file", Path(file_path).stem)
+
+                for scene_cls in scenes:
+                    with manim.tempconfig(scene_config):
+                        scene_cls().render()
+        except BaseException:
+            traceback.print_exc()
+            returncode = 1
+        finally:
+            sys.modules.pop(module_name, None)
+    stdout.close()
+    stderr.close()
+
+    return {
+        "stdout": stdout.tail(),
+        "stderr": stderr.tail(),
+        "returncode": returncode,
+        "stdout_log": stdout_log,
+        "stderr_log": stderr_log,
+    }
+
+def warm_tex_equations(equations: list[str]) -> dict:
+    """Compile `equations` as MathTex into the shared tex cache without rendering a scene."""
+    import manim
+
+    failed = []
+    with manim.tempconfig({"tex_dir": str(tex_cache_dir()), "no_latex_cleanup": True}):
+        for eq in equations:
+            try:
+                manim.MathTex(eq)
+            except Exception:
+                # a bad equation fails again (with a useful log) in the real render
+                failed.append(eq)
+    return {
+        "stdout": f"Warmed {len(equations) - len(failed)}/{len(equations)} equations",
+        "stderr": "\n".join(failed),
+        "returncode": 1 if failed else 0,
+    }
+
+WORKER_TASKS = {
+    "render": render_scene_file,
+    "warm_tex": warm_tex_equations,
+}
+
+def _worker_main(conn):
+    # the expensive part: numpy, cairo, pango and manim itself are imported once per worker
+    import manim  # noqa: F401
+    install_tex_cache_hook()
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if request is None:
+            break
+
+        task = WORKER_TASKS[request.pop("task", "render")]
+        result = task(**request)
+        result["rss_mb"] = _rss_mb()
+        conn.send(result)
+
+
+class RenderWorker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.renders = 0
+
+    def run(self, request: dict, timeout: float) -> dict:
+        self.conn.send(request)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Render exceeded {timeout}s")
+        return self.conn.recv()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class RenderPool:
+    """
+    Long-lived render processes that import manim once. A worker is replaced
+    after `max_renders` renders, when its RSS grows past `max_rss_mb`, or when
+    it crashes or times out; replacements start warming up immediately.
+    """
+
+    def __init__(self, size: int, max_renders: int, max_rss_mb: float, timeout: float):
+        self.ctx = multiprocessing.get_context("spawn")
+        self.max_renders = max_renders
+        self.max_rss_mb = max_rss_mb
+        self.timeout = timeout
+        self.workers: list[RenderWorker] = []
+        self.idle: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        for _ in range(max(1, size)):
+            self.idle.put(self._spawn())
+
+    def _spawn(self) -> RenderWorker:
+        worker = RenderWorker(self.ctx)
+        with self.lock:
+            self.workers.append(worker)
+        return worker
+
+    def _retire(self, worker: RenderWorker):
+        with self.lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+        worker.stop()
+
+    def render(self, file_path: str, **request) -> dict:
+        return self.submit({"task": "render", "file_path": file_path, **request})
+
+    def warm_tex(self, equations: list[str]) -> dict:
+        return self.submit({"task": "warm_tex", "equations": list(equations)})
+
+    def submit(self, request: dict) -> dict:
+        worker = self.idle.get()
+        try:
+            if not worker.process.is_alive():
+                self._retire(worker)
+                worker = self._spawn()
+
+            try:
+                result = worker.run(request, self.timeout)
+            except (TimeoutError, EOFError, OSError) as e:
+                self._retire(worker)
+                worker = self._spawn()
+                return {"stdout": "", "stderr": f"Render worker failed: {e}", "returncode": -1}
+
+            worker.renders += 1
+            rss_mb = result.pop("rss_mb", 0)
+            if worker.renders >= self.max_renders or rss_mb >= self.max_rss_mb:
+                print(f"[Render] Recycling worker {worker.process.pid} after {worker.renders} renders ({rss_mb:.0f} MB)")
+                self._retire(worker)
+                worker = self._spawn()
+            return result
+        finally:
+            self.idle.put(worker)
+
+    def close(self):
+        with self.lock:
+            workers = list(self.workers)
+        for worker in workers:
+            self._retire(worker)
+
+
+_pool: RenderPool | None = None
+_pool_lock = threading.Lock()
+
+def get_render_pool() -> RenderPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RenderPool(
+                RENDER_POOL_SIZE,
+                RENDER_MAX_RENDERS_PER_WORKER,
+                RENDER_MAX_RSS_MB,
+                RENDER_TIMEOUT,
+            )
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,94 @@
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from app.config.config import RENDER_DISK_QUOTA_MB
+
+# files this recent may belong to a render that is still running
+RETENTION_GRACE_SECONDS = 120
+RETENTION_INTERVAL_SECONDS = 60
+
+_last_enforce = 0.0
+_enforce_lock = threading.Lock()
+
+
+def cleanup_render_artifacts(code_file: str, losing_logs: list[str]) -> int:
+    """
+    Called once a script is done: delete the partial movie files of every
+    render of it (the final video is already concatenated) and the logs of
+    iterations that lost to a later one. Returns bytes freed.
+    """
+    freed = 0
+    stem = Path(code_file).stem
+    video_root = Path(code_file).parent / "media" / "videos" / stem
+    if video_root.exists():
+        for partial_dir in video_root.glob("*/partial_movie_files"):
+            freed += _tree_size(partial_dir)
+            shutil.rmtree(partial_dir, ignore_errors=True)
+
+    for log in losing_logs:
+        path = Path(log)
+        if path.exists():
+            freed += path.stat().st_size
+            path.unlink(missing_ok=True)
+    return freed
+
+def _tree_size(root: Path) -> int:
+    return sum(f.stat().st_size for f in root.rglob("*") if f.is_file())
+
+def _artifact_files(output_dir: Path) -> list[Path]:
+    files = [f for root in ("media", "logs") for f in (output_dir / root).rglob("*") if f.is_file()]
+    files += output_dir.glob("*_manim_*.py")
+    return files
+
+def enforce_render_quota(output_dir: str, force: bool = False) -> int:
+    """
+    Delete the oldest render artifacts under `output_dir` (media tree, render
+    logs, generated scripts) until they fit RENDER_DISK_QUOTA_MB. Returns files removed.
+    """
+    global _last_enforce
+    with _enforce_lock:
+        if not force and time.time() - _last_enforce < RETENTION_INTERVAL_SECONDS:
+            return 0
+        _last_enforce = time.time()
+
+    root = Path(output_dir)
+    entries = []
+    total = 0
+    for f in _artifact_files(root):
+        try:
+            stat = f.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, f))
+        total += stat.st_size
+
+    limit = RENDER_DISK_QUOTA_MB * 1024 * 1024
+    removed = 0
+    now = time.time()
+    for mtime, size, f in sorted(entries, key=lambda e: e[0]):
+        if total <= limit:
+            break
+        if now - mtime < RETENTION_GRACE_SECONDS:
+            continue
+        f.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+
+    if removed:
+        _remove_empty_dirs(root / "media", now)
+        _remove_empty_dirs(root / "logs", now)
+        print(f"[Render] Removed {removed} old artifacts, {total / (1024 * 1024):.1f} MB left")
+    return removed
+
+def _remove_empty_dirs(root: Path, now: float):
+    if not root.exists():
+        return
+    # deepest first so parents empty out too; a fresh directory may be about to receive a render
+    for d in sorted((p for p in root.rglob("*") if p.is_dir()), key=lambda p: len(p.parts), reverse=True):
+        try:
+            if now - d.stat().st_mtime >= RETENTION_GRACE_SECONDS:
+                d.rmdir()
+        except OSError:
+            pass
@@ -0,0 +1,183 @@
+import fcntl
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from app.config.config import TEX_CACHE_DIR, TEX_CACHE_MAX_MB
+
+# manim names tex files after a hash of their content, so one directory can be
+# shared by every render and job; entries are pruned least-recently-used first.
+# Renders run with no_latex_cleanup, otherwise every cache miss deletes all non
+# .svg/.tex files in tex_dir, including another render's in-progress .dvi/.aux.
+# Our own files live next to it in meta/ for the same reason.
+TEX_SUBDIR = "tex"
+META_SUBDIR = "meta"
+# "<hits> <misses>" counters, rewritten in place under a file lock so the file never grows
+STATS_FILE = "stats"
+CONFIG_FILE = "manim.cfg"
+# entries this recent may still be half written by a running render
+PRUNE_GRACE_SECONDS = 120
+PRUNE_INTERVAL_SECONDS = 60
+# what a finished entry keeps; the rest is latex by-products
+ENTRY_SUFFIXES = (".svg", ".tex")
+
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+
+def _cache_root() -> Path:
+    return Path(TEX_CACHE_DIR).resolve()
+
+def tex_cache_dir() -> Path:
+    path = _cache_root() / TEX_SUBDIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def _meta_dir() -> Path:
+    path = _cache_root() / META_SUBDIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def tex_cache_config_file() -> str:
+    """manim.cfg pointing the manim cli at the shared cache (for subprocess renders)."""
+    cfg = _meta_dir() / CONFIG_FILE
+    content = f"[CLI]\ntex_dir = {tex_cache_dir()}\nno_latex_cleanup = True\n"
+    if not cfg.exists() or cfg.read_text(encoding="utf-8") != content:
+        tmp = cfg.with_name(f"{CONFIG_FILE}.{os.getpid()}.tmp")
+        tmp.write_text(content, encoding="utf-8")
+        os.replace(tmp, cfg)
+    return str(cfg)
+
+def _parse_stats(data: bytes) -> tuple[int, int]:
+    parts = data.split()
+    if len(parts) != 2:
+        return 0, 0
+    return int(parts[0]), int(parts[1])
+
+def _record(hit: bool):
+    # every render process shares the counters, flock serializes the read-modify-write
+    fd = os.open(_meta_dir() / STATS_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        hits, misses = _parse_stats(os.read(fd, 64))
+        hits, misses = (hits + 1, misses) if hit else (hits, misses + 1)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{hits} {misses}\n".encode())
+    finally:
+        # closing the descriptor releases the lock
+        os.close(fd)
+
+def _read_stats() -> tuple[int, int]:
+    try:
+        fd = os.open(_meta_dir() / STATS_FILE, os.O_RDONLY)
+    except FileNotFoundError:
+        return 0, 0
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        return _parse_stats(os.read(fd, 64))
+    finally:
+        os.close(fd)
+
+def install_tex_cache_hook():
+    """
+    Wrap manim's tex_to_svg_file (in a render worker) to count hits and misses
+    and refresh the mtime of reused entries, which is what LRU pruning sorts by.
+    """
+    from manim.utils import tex_file_writing
+
+    original = tex_file_writing.tex_to_svg_file
+    if getattr(original, "_professorai_cached", False):
+        return
+
+    def tex_to_svg_file(expression, environment=None, tex_template=None):
+        tex_file = Path(tex_file_writing.generate_tex_file(expression, environment, tex_template))
+        svg_file = tex_file.with_suffix(".svg")
+        hit = svg_file.exists()
+        result = original(expression, environment, tex_template)
+        if hit:
+            os.utime(svg_file)
+        _record(hit)
+        return result
+
+    tex_to_svg_file._professorai_cached = True
+
+    # mobject modules import the function by name, patch those references too
+    for name, module in list(sys.modules.items()):
+        if name.startswith("manim") and getattr(module, "tex_to_svg_file", None) is original:
+            module.tex_to_svg_file = tex_to_svg_file
+
+def _entries(cache_dir: Path) -> dict[str, list[Path]]:
+    entries: dict[str, list[Path]] = {}
+    for path in cache_dir.iterdir():
+        if path.is_file() and path.suffix in ENTRY_SUFFIXES:
+            entries.setdefault(path.stem, []).append(path)
+    return entries
+
+def prune_tex_cache(force: bool = False) -> int:
+    """Delete least recently used entries until the cache fits TEX_CACHE_MAX_MB. Returns entries removed."""
+    global _last_prune
+    with _prune_lock:
+        if not force and time.time() - _last_prune < PRUNE_INTERVAL_SECONDS:
+            return 0
+        _last_prune = time.time()
+
+    cache_dir = tex_cache_dir()
+    now = time.time()
+    _remove_flat_layout(_cache_root())
+    # latex by-products no render cleans up any more (see no_latex_cleanup above)
+    for path in cache_dir.iterdir():
+        try:
+            if path.is_file() and path.suffix not in ENTRY_SUFFIXES and now - path.stat().st_mtime >= PRUNE_GRACE_SECONDS:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+    entries = []
+    total = 0
+    for stem, files in _entries(cache_dir).items():
+        try:
+            stats = [f.stat() for f in files]
+        except FileNotFoundError:
+            continue
+        size = sum(s.st_size for s in stats)
+        entries.append((max(s.st_mtime for s in stats), size, files))
+        total += size
+
+    limit = TEX_CACHE_MAX_MB * 1024 * 1024
+    removed = 0
+    for last_used, size, files in sorted(entries, key=lambda e: e[0]):
+        if total <= limit:
+            break
+        if now - last_used < PRUNE_GRACE_SECONDS:
+            continue
+        for f in files:
+            f.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+
+    if removed:
+        print(f"[TexCache] Pruned {removed} entries, {total / (1024 * 1024):.1f} MB left")
+    return removed
+
+def _remove_flat_layout(root: Path):
+    # earlier versions kept entries, counters and manim.cfg directly in TEX_CACHE_DIR
+    for path in root.iterdir():
+        if path.is_file():
+            path.unlink(missing_ok=True)
+
+def get_tex_cache_stats() -> dict:
+    hits, misses = _read_stats()
+
+    entries = _entries(tex_cache_dir())
+    size = sum(f.stat().st_size for files in entries.values() for f in files if f.exists())
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        "entries": len(entries),
+        "size_mb": round(size / (1024 * 1024), 2),
+        "max_mb": TEX_CACHE_MAX_MB,
+    }
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.config.config import UPLOAD_DIR, UPLOAD_MAX_MB
+
+
+class _PdfPartSink:
+    """Multipart callbacks that stream the `file` part to a temp file while hashing it."""
+
+    def __init__(self, tmp_file):
+        self.tmp_file = tmp_file
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.found = False
+        self.in_file = False
+        self.header_field = b""
+        self.header_value = b""
+        self.headers: dict[bytes, bytes] = {}
+
+    def on_part_begin(self):
+        self.headers = {}
+
+    def on_header_field(self, data, start, end):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field, self.header_value = b"", b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        # only the first `file` part is kept
+        self.in_file = options.get(b"name") == b"file" and not self.found
+        self.found = self.found or self.in_file
+
+    def on_part_data(self, data, start, end):
+        if not self.in_file:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > UPLOAD_MAX_MB * 1024 * 1024:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds {UPLOAD_MAX_MB:.0f} MB")
+        if len(self.head) < 5:
+            self.head += chunk[:5]
+        self.hasher.update(chunk)
+        self.tmp_file.write(chunk)
+
+    def on_part_end(self):
+        self.in_file = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+
+async def spool_pdf_upload(request: Request) -> tuple[str, str]:
+    """
+    Stream the `file` field of a multipart request to UPLOAD_DIR, hashing it as
+    the bytes arrive (the body is never held in memory). The PDF is stored as
+    `<sha256>.pdf`, so identical uploads share one file. Returns (path, sha256).
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload with a `file` field")
+
+    upload_dir = Path(UPLOAD_DIR)
+    (upload_dir / "tmp").mkdir(parents=True, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(dir=upload_dir / "tmp", suffix=".part", delete=False) as tmp_file:
+        tmp_path = tmp_file.name
+        try:
+            sink = _PdfPartSink(tmp_file)
+            parser = MultipartParser(options[b"boundary"], sink.callbacks())
+            async for chunk in request.stream():
+                parser.write(chunk)
+            parser.finalize()
+        except Exception:
+            tmp_file.close()
+            os.unlink(tmp_path)
+            raise
+
+    if not sink.found or not sink.head.startswith(b"%PDF-"):
+        os.unlink(tmp_path)
+        raise HTTPException(status_code=400, detail="The `file` field must contain a PDF")
+
+    digest = sink.hasher.hexdigest()
+    final_path = upload_dir / f"{digest}.pdf"
+    if final_path.exists():
+        os.unlink(tmp_path)
+    else:
+        os.replace(tmp_path, final_path)
+    return str(final_path), digest
@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from app.config.config import JOB_WORK_DIR
+
+MANIFEST = "manifest.json"
+
+
+def job_work_dir(job_id: str) -> Path:
+    return Path(JOB_WORK_DIR) / job_id
+
+def _write_atomic(path: Path, data):
+    # a crash mid-write must never leave a half written checkpoint behind
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _read_units(path: Path) -> dict[int, object]:
+    units: dict[int, object] = {}
+    if not path.exists():
+        return units
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # torn last line from a crash, that unit is simply redone
+                continue
+            units[record["index"]] = record["result"]
+    return units
+
+
+class PipelineCheckpoint:
+    """
+    Per-job working directory holding the output of every finished unit of work:
+    whole stages as `<stage>.json`, per-chapter results appended to `<stage>.jsonl`.
+    A rerun of the same job loads these and only does what is missing.
+    """
+
+    def __init__(self, work_dir: Path, inputs: dict):
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self.work_dir / MANIFEST
+        if manifest.exists() and json.loads(manifest.read_text(encoding="utf-8")) != inputs:
+            # the job was resubmitted with different inputs, earlier results do not apply
+            self.clear()
+            self.work_dir.mkdir(parents=True, exist_ok=True)
+        if not manifest.exists():
+            _write_atomic(manifest, inputs)
+
+    def load_stage(self, stage: str):
+        path = self.work_dir / f"{stage}.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def save_stage(self, stage: str, data):
+        _write_atomic(self.work_dir / f"{stage}.json", data)
+
+    def load_units(self, stage: str) -> dict[int, object]:
+        """Finished per-chapter results of `stage` by chapter index."""
+        return _read_units(self.work_dir / f"{stage}.jsonl")
+
+    def save_unit(self, stage: str, index: int, result):
+        with open(self.work_dir / f"{stage}.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"index": index, "result": result}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def load_checkpoint_progress(job_id: str) -> Optional[dict]:
+    """Which stages and how many chapters per stage a job has checkpointed (None if nothing)."""
+    work_dir = job_work_dir(job_id)
+    if not work_dir.exists():
+        return None
+    progress = {}
+    for path in sorted(work_dir.iterdir()):
+        if path.suffix == ".json" and path.name != MANIFEST:
+            progress[path.stem] = "done"
+        elif path.suffix == ".jsonl":
+            progress[path.stem] = len(_read_units(path))
+    return progress
@@ -1,14 +1,11 @@
-import re
+from app.utils.output_scanner import scan
 
 def extract_code_blocks(text):
-    code_pattern = re.compile(
-        r"```([a-zA-Z0-9_]+)?\n(.*?)```", re.DOTALL
-    )
+    spans, _ = scan(text)
 
     blocks = {}
-    for match in re.finditer(code_pattern, text):
-        block_type = match.group(1) or "unknown"
-        code_content = match.group(2).strip()
-        blocks[block_type] = code_content
+    for span in sorted(spans, key=lambda s: s.start):
+        if span.kind == "code":
+            blocks[span.lang] = span.text
 
     return blocks
\ No newline at end of file
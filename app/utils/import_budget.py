@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+from app.config.config import IMPORT_BUDGET_MS, IMPORT_BUDGET_STRICT
+
+# must only be imported on first use (pipelines, render workers), never by app.main
+HEAVY_MODULES = ("dspy", "litellm", "cv2", "pdfplumber", "pyvis", "neo4j", "manim", "numpy")
+
+
+def loaded_heavy_modules() -> list[str]:
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+def check_import_budget(elapsed_s: float):
+    """Called once app.main has finished importing, warns (or raises when strict) on a slow or heavy cold start."""
+    problems = []
+    if elapsed_s * 1000 > IMPORT_BUDGET_MS:
+        problems.append(f"import took {elapsed_s * 1000:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    heavy = loaded_heavy_modules()
+    if heavy:
+        problems.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+
+    if not problems:
+        return
+    message = "[Startup] " + "; ".join(problems)
+    if IMPORT_BUDGET_STRICT:
+        raise RuntimeError(message)
+    print(message)
+
+def measure_cold_start(module: str = "app.main") -> dict:
+    """Import `module` in a fresh interpreter and report its import time, peak RSS and heavy imports."""
+    code = (
+        "import time, resource, sys\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - t\n"
+        "from app.utils.import_budget import loaded_heavy_modules\n"
+        "print(elapsed * 1000, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, ','.join(loaded_heavy_modules()))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    elapsed_ms, rss_mb, heavy = (out.stdout.strip().splitlines()[-1].split(" ") + [""])[:3]
+    return {
+        "import_ms": round(float(elapsed_ms), 1),
+        "peak_rss_mb": round(float(rss_mb), 1),
+        "heavy_modules": [m for m in heavy.split(",") if m],
+    }
+
+
+if __name__ == "__main__":
+    # python -m app.utils.import_budget, exits non-zero when the budget is exceeded (for CI)
+    report = measure_cold_start()
+    print(report)
+    if report["import_ms"] > IMPORT_BUDGET_MS or report["heavy_modules"]:
+        sys.exit(1)
@@ -1,23 +1,310 @@
+import json
+import os
+import sqlite3
+import threading
+import time
 from uuid import uuid4
 from enum import Enum
-from typing import Dict
+from typing import Dict, Optional
+
+from app.config.config import DEPLOY_MODE, JOB_STORE, JOB_DB_PATH, JOB_LEASE_SECONDS
 
 class JobStatus(str, Enum):
     PENDING = "pending"
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job run that noticed it was cancelled or superseded by a
+    newer run of the same job; its checkpoints are kept for a resume.
+    """
+
+# job fields a status transition may set alongside the status
+TRANSITION_FIELDS = ("result", "error", "run_id")
+
+
+class MemoryJobStore:
+    """Job state kept in this process only (default single-process deployment)."""
+
+    def __init__(self):
+        self.jobs: Dict[str, dict] = {}
+        self.keys: Dict[str, str] = {}
+        self.lock = threading.Lock()
+
+    def create(self, job_id: str, kind: Optional[str], payload: Optional[dict], queued: bool, dedup_key: Optional[str] = None):
+        with self.lock:
+            self._insert(job_id, kind, payload, queued, dedup_key)
+
+    def _insert(self, job_id, kind, payload, queued, dedup_key):
+        self.jobs[job_id] = {
+            "status": JobStatus.PENDING, "result": None, "error": None,
+            "kind": kind, "payload": payload, "queued": queued, "dedup_key": dedup_key, "run_id": None,
+        }
+        if dedup_key:
+            self.keys[dedup_key] = job_id
+
+    def get_or_create(self, job_id: str, kind, payload, queued: bool, dedup_key: str) -> tuple[str, bool]:
+        with self.lock:
+            existing = self.keys.get(dedup_key)
+            if existing and self.jobs[existing]["status"] not in (JobStatus.FAILED, JobStatus.CANCELLED):
+                return existing, False
+            self._insert(job_id, kind, payload, queued, dedup_key)
+            return job_id, True
+
+    def update(self, job_id: str, status: JobStatus, result, error):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update({"status": status, "result": result, "error": error})
+
+    def transition(self, job_id: str, from_statuses, status: JobStatus, current_run: Optional[str] = None, **fields) -> bool:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] not in from_statuses:
+                return False
+            if current_run is not None and job["run_id"] != current_run:
+                return False
+            job.update(fields, status=status)
+            return True
+
+    def heartbeat(self, job_id: str, run_id: str) -> bool:
+        # jobs in memory die with their process, there is nothing to reclaim
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job is not None and job["status"] == JobStatus.RUNNING and job["run_id"] == run_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def claim(self, worker_id: str) -> Optional[str]:
+        with self.lock:
+            for job_id, job in self.jobs.items():
+                if job["queued"] and job["status"] == JobStatus.PENDING:
+                    job["status"] = JobStatus.RUNNING
+                    return job_id
+        return None
+
+
+class SQLiteJobStore:
+    """
+    Job state and work queue in a local SQLite file, so every API and worker
+    process on the host sees the same jobs.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                kind TEXT,
+                payload TEXT,
+                queued INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                dedup_key TEXT,
+                run_id TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "dedup_key" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN dedup_key TEXT")
+        if "run_id" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN run_id TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (queued, status, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, created_at)")
 
-jobs: Dict[str, dict] = {}
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections must not be shared between threads
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self.local.conn = conn
+        return conn
 
-def create_job() -> str:
+    def create(self, job_id: str, kind: Optional[str], payload: Optional[dict], queued: bool, dedup_key: Optional[str] = None):
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, status, kind, payload, queued, dedup_key, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, JobStatus.PENDING.value, kind, json.dumps(payload), int(queued), dedup_key, now, now),
+        )
+
+    def get_or_create(self, job_id: str, kind, payload, queued: bool, dedup_key: str) -> tuple[str, bool]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, status, queued, updated_at FROM jobs WHERE dedup_key = ? AND status NOT IN (?, ?) ORDER BY created_at DESC LIMIT 1",
+                (dedup_key, JobStatus.FAILED.value, JobStatus.CANCELLED.value),
+            ).fetchone()
+            if row is not None and self._lost(row):
+                # an inline job whose process died, nobody will ever finish it
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                    (JobStatus.FAILED.value, "Job runner stopped heartbeating", time.time(), row["id"]),
+                )
+                row = None
+            if row is None:
+                self.create(job_id, kind, payload, queued, dedup_key)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return (row["id"], False) if row is not None else (job_id, True)
+
+    def update(self, job_id: str, status: JobStatus, result, error):
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+            (JobStatus(status).value, json.dumps(result), error, time.time(), job_id),
+        )
+
+    @staticmethod
+    def _lost(row) -> bool:
+        return (
+            not row["queued"]
+            and row["status"] == JobStatus.RUNNING.value
+            and row["updated_at"] < time.time() - JOB_LEASE_SECONDS
+        )
+
+    def heartbeat(self, job_id: str, run_id: str) -> bool:
+        """Extend the lease of a RUNNING job, False once this run is no longer the running one."""
+        cur = self._conn().execute(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ? AND run_id = ?",
+            (time.time(), job_id, JobStatus.RUNNING.value, run_id),
+        )
+        return cur.rowcount == 1
+
+    def transition(self, job_id: str, from_statuses, status: JobStatus, current_run: Optional[str] = None, **fields) -> bool:
+        if set(fields) - set(TRANSITION_FIELDS):
+            raise ValueError(f"Unsupported job fields: {sorted(set(fields) - set(TRANSITION_FIELDS))}")
+        values = {k: json.dumps(v) if k == "result" else v for k, v in fields.items()}
+        from_values = [JobStatus(s).value for s in from_statuses]
+        sql = "UPDATE jobs SET " + "".join(f"{k} = ?, " for k in values) + "status = ?, updated_at = ? "
+        sql += f"WHERE id = ? AND status IN ({', '.join('?' * len(from_values))})"
+        params = [*values.values(), JobStatus(status).value, time.time(), job_id, *from_values]
+        if current_run is not None:
+            sql += " AND run_id = ?"
+            params.append(current_run)
+        return self._conn().execute(sql, params).rowcount == 1
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "status": JobStatus(row["status"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "kind": row["kind"],
+            "payload": json.loads(row["payload"]) if row["payload"] else None,
+            "queued": bool(row["queued"]),
+            "run_id": row["run_id"],
+        }
+
+    def claim(self, worker_id: str) -> Optional[str]:
+        # BEGIN IMMEDIATE takes the write lock up front so two workers never claim the same job
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # RUNNING jobs whose lease expired belong to a worker that died, they are claimed again
+            row = conn.execute(
+                "SELECT id, worker, status FROM jobs WHERE queued = 1 AND (status = ? OR (status = ? AND updated_at < ?)) "
+                "ORDER BY created_at LIMIT 1",
+                (JobStatus.PENDING.value, JobStatus.RUNNING.value, time.time() - JOB_LEASE_SECONDS),
+            ).fetchone()
+            if row is not None and row["status"] == JobStatus.RUNNING.value:
+                print(f"[Jobs] Reclaiming job {row['id']} from {row['worker']}, its lease expired")
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, updated_at = ? WHERE id = ?",
+                    (JobStatus.RUNNING.value, worker_id, time.time(), row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row["id"] if row is not None else None
+
+
+def _make_store():
+    if DEPLOY_MODE == "queue" and JOB_STORE != "sqlite":
+        # queued jobs are only picked up by worker.py, which cannot see an in-process store
+        raise ValueError(f"DEPLOY_MODE=queue needs JOB_STORE=sqlite, got JOB_STORE={JOB_STORE}")
+    if JOB_STORE == "sqlite":
+        return SQLiteJobStore(JOB_DB_PATH)
+    if JOB_STORE == "memory":
+        return MemoryJobStore()
+    raise ValueError(f"Unknown JOB_STORE: {JOB_STORE}")
+
+store = _make_store()
+
+def create_job(kind: Optional[str] = None, payload: Optional[dict] = None, queued: bool = False) -> str:
     job_id = str(uuid4())
-    jobs[job_id] = {"status": JobStatus.PENDING, "result": None, "error": None}
+    store.create(job_id, kind, payload, queued)
     return job_id
 
+def get_or_create_job(dedup_key: str, kind: Optional[str] = None, payload: Optional[dict] = None, queued: bool = False) -> tuple[str, bool]:
+    """
+    Return the newest job submitted under `dedup_key` unless it failed or was cancelled, otherwise
+    create one. The second value tells whether a new job was created.
+    """
+    return store.get_or_create(str(uuid4()), kind, payload, queued, dedup_key)
+
 def update_job(job_id: str, status: JobStatus, result=None, error=None):
-    if job_id in jobs:
-        jobs[job_id].update({"status": status, "result": result, "error": error})
+    store.update(job_id, status, result, error)
+
+def transition_job(job_id: str, from_statuses, status: JobStatus, current_run: Optional[str] = None, **fields) -> bool:
+    """
+    Atomically move a job to `status` (also setting any of `result`, `error`,
+    `run_id`) if it is currently in one of `from_statuses` and, when
+    `current_run` is given, still owned by that run.
+    """
+    return store.transition(job_id, tuple(from_statuses), status, current_run, **fields)
+
+def start_job_run(job_id: str) -> Optional[str]:
+    """
+    Mark a pending (or claimed) job RUNNING under a fresh run id and return it,
+    None if the job is not runnable. Any older run of the job loses ownership.
+    """
+    run_id = str(uuid4())
+    if transition_job(job_id, (JobStatus.PENDING, JobStatus.RUNNING), JobStatus.RUNNING, run_id=run_id):
+        return run_id
+    return None
+
+def is_current_run(job_id: str, run_id: str) -> bool:
+    """False once the job was cancelled, finished or taken over by a newer run."""
+    job = store.get(job_id)
+    return job is not None and job["status"] == JobStatus.RUNNING and job.get("run_id") == run_id
 
 def get_job(job_id: str):
-    return jobs.get(job_id, {"status": "unknown"})
\ No newline at end of file
+    job = store.get(job_id)
+    if job is None:
+        return {"status": "unknown"}
+    return {"status": job["status"], "result": job["result"], "error": job["error"]}
+
+def get_job_spec(job_id: str) -> Optional[dict]:
+    """Internal view of a job including the `kind` and `payload` it was submitted with."""
+    return store.get(job_id)
+
+def heartbeat_job(job_id: str, run_id: str) -> bool:
+    return store.heartbeat(job_id, run_id)
+
+def claim_job(worker_id: str) -> Optional[str]:
+    """
+    Atomically move the oldest queued job to RUNNING and return its id. A job
+    RUNNING without a heartbeat for JOB_LEASE_SECONDS is claimed again.
+    """
+    return store.claim(worker_id)
@@ -1,30 +1,26 @@
-import json
-import re
+from app.utils.output_scanner import scan, load_json_span, ParseError
 
 
 def extract_json_from_document(document_text):
-   
-    json_pattern = r'\[\s*\{.*?\}\s*\]'
-    match = re.search(json_pattern, document_text, re.DOTALL)
 
-    def try_parse_json(json_str):
+    spans, errors = scan(document_text)
+    arrays = [s for s in sorted(spans, key=lambda s: s.start) if s.kind == "array"]
+
+    def try_parse_json(span):
         try:
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
+            return load_json_span(document_text, span)
+        except ParseError as e:
             print(f"Error parsing JSON: {e}")
             return None
 
-    if match:
-        data = try_parse_json(match.group(0))
-        if data is not None:
-            return data
-
-    start_idx = document_text.find('[')
-    end_idx = document_text.rfind(']')
-    if start_idx != -1 and end_idx != -1:
-        json_str = document_text[start_idx:end_idx + 1]
-        data = try_parse_json(json_str)
+    # prefer an array of objects, then any other array
+    candidates = [s for s in arrays if s.text[1:].lstrip().startswith("{")]
+    candidates += [s for s in arrays if s not in candidates]
+    for span in candidates:
+        data = try_parse_json(span)
         if data is not None:
             return data
 
+    for e in errors:
+        print(f"Error scanning JSON: {e}")
     return None
\ No newline at end of file
@@ -1,40 +1,66 @@
 import ast
-import re
+from app.utils.output_scanner import scan
 
 def extract_list(document_text):
-    start_idx = document_text.find('[')
-    end_idx = document_text.rfind(']')
-    
-    if start_idx == -1 or end_idx == -1 or start_idx >= end_idx:
+    spans, _ = scan(document_text)
+    arrays = [s for s in sorted(spans, key=lambda s: s.start) if s.kind == "array"]
+
+    if not arrays:
         return None
-    
-    list_str = document_text[start_idx:end_idx + 1]
-    
-    try:
-        parsed_list = ast.literal_eval(list_str)
-        
+
+    for span in arrays:
+        try:
+            parsed_list = ast.literal_eval(span.text)
+        except (ValueError, SyntaxError):
+            continue
+
         if isinstance(parsed_list, list):
             return [str(item).strip() for item in parsed_list]
-        else:
-            return None
-            
-    except (ValueError, SyntaxError):
-        return extract_list_regex(list_str)
+
+    return extract_list_regex(arrays[0].text)
 
 
 def extract_list_regex(list_str):
+    # single pass split on top-level commas, quotes (and escaped quotes) are respected
     content = list_str.strip()[1:-1]
-    
+
     if not content.strip():
         return []
-    pattern = r'''(?:['"]((?:[^'"]|(?<=\\)['"])*)['"]|([^,]+))'''
-    matches = re.findall(pattern, content)
-    
+
     result = []
-    for match in matches:
-        item = match[0] if match[0] else match[1]
+    current = []
+    quote = None
+    escape = False
+    depth = 0
+    for ch in content:
+        if quote:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == quote:
+                quote = None
+            current.append(ch)
+            continue
+        if ch in "'\"":
+            quote = ch
+        elif ch in "[{(":
+            depth += 1
+        elif ch in "]})":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            result.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    result.append("".join(current))
+
+    items = []
+    for item in result:
         item = item.strip()
+        if len(item) >= 2 and item[0] == item[-1] and item[0] in "'\"":
+            item = item[1:-1].strip()
         if item:
-            result.append(item)
-    
-    return result if result else None
\ No newline at end of file
+            items.append(item)
+
+    return items if items else None
\ No newline at end of file
@@ -0,0 +1,242 @@
+import json
+import re
+from typing import NamedTuple, Optional
+
+# runs of characters that cannot change the scanner state, per (fence, struct) state
+_SPECIAL = {
+    "fence_text": "`",
+    "fence_info": "\n",
+    "fence_code": "`",
+    "struct_none": "[{",
+    "struct_open": "\"'[]{}",
+}
+_skip_patterns: dict[str, re.Pattern] = {}
+# a single quote only opens a string where a python value or key can start
+_VALUE_START = set("[{,:")
+_CLOSERS = {"]": "[", "}": "{"}
+
+
+class ParseError(ValueError):
+    def __init__(self, message: str, offset: int, line: int, column: int):
+        super().__init__(f"{message} (line {line}, column {column}, char {offset})")
+        self.message = message
+        self.offset = offset
+        self.line = line
+        self.column = column
+
+
+class ScanSpan(NamedTuple):
+    kind: str  # "array", "object" or "code"
+    start: int
+    end: int
+    text: str
+    lang: Optional[str] = None
+
+
+class OutputScanner:
+    """
+    Single-pass scanner over LLM output that finds fenced code blocks and
+    balanced JSON / python-literal arrays and objects in O(n).
+
+    Text can be fed in streaming chunks; `feed` returns the spans completed by
+    that chunk and `close` flushes the rest. Problems (mismatched brackets,
+    unterminated strings, blocks or structures) are collected in `errors`
+    with their exact position instead of silently picking a wrong span.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.line = 1
+        self.column = 1
+        self.errors: list[ParseError] = []
+
+        # fenced code block state: "text", "info" (reading the language) or "code"
+        self.fence = "text"
+        self.ticks = 0
+        self.fence_info: list[str] = []
+        self.fence_lang: Optional[str] = None
+        self.fence_start = 0
+        self.code: list[str] = []
+
+        # bracket state for the current top-level structure
+        self.stack: list[tuple[str, int, int, int]] = []
+        self.buf: list[str] = []
+        self.root_start = 0
+        self.in_string: Optional[str] = None
+        self.escape = False
+        self.last_sig = ""
+        # completed direct children of the root, used when the root itself is broken
+        self.children: list[tuple[int, int]] = []
+
+    def _error(self, message: str, offset=None, line=None, column=None):
+        self.errors.append(ParseError(
+            message,
+            self.offset if offset is None else offset,
+            self.line if line is None else line,
+            self.column if column is None else column,
+        ))
+
+    # fenced code blocks
+    def _fence_char(self, ch: str, out: list):
+        if self.fence == "text":
+            self.ticks = self.ticks + 1 if ch == "`" else 0
+            if self.ticks == 3:
+                self.fence, self.ticks, self.fence_info = "info", 0, []
+                self.fence_start = self.offset - 2
+        elif self.fence == "info":
+            if ch == "\n":
+                info = "".join(self.fence_info).strip()
+                if re.fullmatch(r"[A-Za-z0-9_]*", info):
+                    self.fence, self.fence_lang, self.code = "code", info or "unknown", []
+                else:
+                    # ``` followed by prose is not a fence
+                    self.fence = "text"
+            else:
+                self.fence_info.append(ch)
+        else:
+            self.code.append(ch)
+            self.ticks = self.ticks + 1 if ch == "`" else 0
+            if self.ticks == 3:
+                content = "".join(self.code[:-3]).strip()
+                out.append(ScanSpan("code", self.fence_start, self.offset + 1, content, self.fence_lang))
+                self.fence, self.ticks = "text", 0
+
+    # brackets and strings
+    def _reset_struct(self, salvage: bool, out: list):
+        if salvage:
+            base, joined = self.root_start, "".join(self.buf)
+            for start, end in self.children:
+                text = joined[start - base:end - base]
+                out.append(ScanSpan("array" if text[0] == "[" else "object", start, end, text))
+        self.stack, self.buf, self.children = [], [], []
+        self.in_string, self.escape, self.last_sig = None, False, ""
+
+    def _struct_char(self, ch: str, out: list):
+        if not self.stack:
+            if ch in "[{":
+                self.stack.append((ch, self.offset, self.line, self.column))
+                self.buf = [ch]
+                self.root_start = self.offset
+                self.last_sig = ch
+            return
+
+        self.buf.append(ch)
+        if self.in_string:
+            if self.escape:
+                self.escape = False
+            elif ch == "\\":
+                self.escape = True
+            elif ch == self.in_string:
+                self.in_string = None
+                self.last_sig = ch
+            elif ch == "\n" and self.in_string == "'":
+                self._error("unterminated string")
+                self._reset_struct(True, out)
+            return
+
+        if ch == '"' or (ch == "'" and self.last_sig in _VALUE_START):
+            self.in_string = ch
+        elif ch in "[{":
+            self.stack.append((ch, self.offset, self.line, self.column))
+        elif ch in "]}":
+            opener, start, line, column = self.stack[-1]
+            if opener != _CLOSERS[ch]:
+                self._error(f"mismatched '{ch}' for '{opener}' opened at line {line} column {column}")
+                self._reset_struct(True, out)
+                return
+            self.stack.pop()
+            if not self.stack:
+                text = "".join(self.buf)
+                out.append(ScanSpan("array" if opener == "[" else "object", start, self.offset + 1, text))
+                self._reset_struct(False, out)
+                return
+            if len(self.stack) == 1:
+                self.children.append((start, self.offset + 1))
+        if not ch.isspace():
+            self.last_sig = ch
+
+    def _skip_pattern(self) -> Optional[re.Pattern]:
+        # mid-backtick-run or mid-escape every character matters
+        if self.ticks or self.escape:
+            return None
+        if self.in_string:
+            struct = "\\\n" + self.in_string
+        else:
+            struct = _SPECIAL["struct_open" if self.stack else "struct_none"]
+        chars = _SPECIAL[f"fence_{self.fence}"] + struct
+        if chars not in _skip_patterns:
+            _skip_patterns[chars] = re.compile("[" + re.escape(chars) + "]")
+        return _skip_patterns[chars]
+
+    def _skip(self, run: str):
+        # bulk-apply a run of characters that cannot change any state
+        if self.stack:
+            self.buf.append(run)
+            if not self.in_string and run.strip():
+                self.last_sig = run.rstrip()[-1]
+        if self.fence == "code":
+            self.code.append(run)
+        elif self.fence == "info":
+            self.fence_info.append(run)
+
+        newlines = run.count("\n")
+        self.line += newlines
+        self.column = (len(run) - run.rfind("\n")) if newlines else self.column + len(run)
+        self.offset += len(run)
+
+    def feed(self, chunk: str) -> list[ScanSpan]:
+        out: list[ScanSpan] = []
+        i, n = 0, len(chunk)
+        while i < n:
+            # fast path: jump to the next character that can change the state
+            pattern = self._skip_pattern()
+            if pattern is not None:
+                match = pattern.search(chunk, i)
+                j = match.start() if match else n
+                if j > i:
+                    self._skip(chunk[i:j])
+                    i = j
+                    continue
+
+            ch = chunk[i]
+            self._fence_char(ch, out)
+            self._struct_char(ch, out)
+
+            self.offset += 1
+            if ch == "\n":
+                self.line += 1
+                self.column = 1
+            else:
+                self.column += 1
+            i += 1
+        return out
+
+    def close(self) -> list[ScanSpan]:
+        out: list[ScanSpan] = []
+        if self.stack:
+            opener, _, line, column = self.stack[0]
+            kind = "array" if opener == "[" else "object"
+            self._error(f"unterminated {kind} opened at line {line} column {column}")
+            self._reset_struct(True, out)
+        if self.fence == "code":
+            self._error(f"unterminated ```{self.fence_lang} block")
+        return out
+
+
+def scan(text: str) -> tuple[list[ScanSpan], list[ParseError]]:
+    scanner = OutputScanner()
+    spans = scanner.feed(text) + scanner.close()
+    return spans, scanner.errors
+
+def _position(text: str, offset: int) -> tuple[int, int]:
+    line = text.count("\n", 0, offset) + 1
+    return line, offset - (text.rfind("\n", 0, offset) + 1) + 1
+
+def load_json_span(document_text: str, span: ScanSpan):
+    """json.loads a span, re-raising decode errors as ParseError positioned in the whole document."""
+    try:
+        return json.loads(span.text)
+    except json.JSONDecodeError as e:
+        offset = span.start + e.pos
+        line, column = _position(document_text, offset)
+        raise ParseError(e.msg, offset, line, column) from e
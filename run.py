@@ -1,6 +1,8 @@
 import uvicorn
 import os
 
+from app.config.config import API_WORKERS
+
 if __name__ == "__main__":
     dev_mode = os.getenv("DEV_MODE", "0") == "1"
     uvicorn.run(
@@ -9,4 +11,6 @@ if __name__ == "__main__":
         port=8000,
         reload=dev_mode,
         reload_dirs=["app"] if dev_mode else [],
-    )
\ No newline at end of file
+        # uvicorn cannot combine reload with multiple workers
+        workers=1 if dev_mode else API_WORKERS,
+    )
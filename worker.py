@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+import socket
+import time
+
+from app.config.config import DEPLOY_MODE, JOB_STORE, WORKER_PROCESSES, WORKER_POLL_INTERVAL
+
+
+def work_loop():
+    # imported here so each spawned process opens its own store connection
+    from app.services.job_runner import run_job
+    from app.utils.job_status import claim_job
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    print(f"[Worker] {worker_id} waiting for jobs...")
+
+    while True:
+        job_id = claim_job(worker_id)
+        if job_id is None:
+            time.sleep(WORKER_POLL_INTERVAL)
+            continue
+
+        print(f"[Worker] {worker_id} running job {job_id}")
+        run_job(job_id)
+
+
+if __name__ == "__main__":
+    if JOB_STORE != "sqlite":
+        raise SystemExit("worker.py needs a shared job store, set JOB_STORE=sqlite (or DEPLOY_MODE=queue)")
+    if DEPLOY_MODE != "queue":
+        print("[Worker] DEPLOY_MODE is not 'queue', API processes will keep running jobs inline")
+
+    if WORKER_PROCESSES <= 1:
+        work_loop()
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=work_loop) for _ in range(WORKER_PROCESSES)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()